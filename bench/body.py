@@ -0,0 +1,90 @@
+# Collecting a request body from native chunks, the BytesIO path get_data used
+# (unpack, write, getvalue) against BodyReader copying each chunk once into a
+# growing bytearray and against a bytearray preallocated from Content-Length,
+# which pays for zero filling the whole buffer up front.
+#
+#   PYTHONPATH=. python bench/body.py
+import timeit
+from io import BytesIO
+
+from socketify_extra.uws import ffi
+from socketify_extra.streams import BodyReader
+
+CHUNK_SIZE = 16 * 1024
+SIZES = (10 * 1024, 32 * 1024, 100 * 1024)
+
+
+class Future:
+    def done(self):
+        return False
+
+    def set_result(self, result):
+        self.result = result
+
+
+def run(size):
+    payload = (b'{"id": 1, "name": "socketify", "tags": ["a", "b"]},' * (size // 50 + 1))[:size]
+    chunks = [
+        (ffi.from_buffer(payload[offset : offset + CHUNK_SIZE]), len(payload[offset : offset + CHUNK_SIZE]))
+        for offset in range(0, size, CHUNK_SIZE)
+    ]
+
+    def bytes_io():
+        # the old get_data handler, fed by ffi.unpack in the native callback
+        future = Future()
+        data = BytesIO()
+
+        def get_chunks(chunk, is_end):
+            if chunk is not None:
+                data.write(chunk)
+            if is_end:
+                future.set_result(data)
+
+        for index, (chunk, length) in enumerate(chunks):
+            get_chunks(ffi.unpack(chunk, length), index == len(chunks) - 1)
+        return future.result.getvalue()
+
+    def preallocated():
+        future = Future()
+        body = bytearray(size)
+        pointer = ffi.from_buffer(body)
+        offset = 0
+        for chunk, length in chunks:
+            ffi.memmove(pointer + offset, chunk, length)
+            offset += length
+        ffi.release(pointer)
+        future.set_result(body)
+        return future.result
+
+    def reader():
+        future = Future()
+        body_reader = BodyReader(future)
+        write = body_reader.write
+        for chunk, length in chunks:
+            write(chunk, length)
+        body_reader.end()
+        return future.result
+
+    assert bytes_io() == preallocated() == reader() == payload
+    iterations = max(1000, 200_000_000 // size // 100)
+    results = [
+        (name, timeit.timeit(function, number=iterations) / iterations * 1e9)
+        for (name, function) in (
+            ("BytesIO", bytes_io),
+            ("preallocated", preallocated),
+            ("BodyReader", reader),
+        )
+    ]
+    print("body %d bytes in %d chunks" % (size, len(chunks)))
+    for name, elapsed in results:
+        print("  %-12s %.0f ns/request" % (name, elapsed))
+    print("  saved        %.1f%%" % ((1 - results[2][1] / results[0][1]) * 100))
+
+
+def main():
+    for size in SIZES:
+        run(size)
+
+
+if __name__ == "__main__":
+    main()
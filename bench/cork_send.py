@@ -0,0 +1,77 @@
+# Time spent in cork_send after an await answering with a status and a JSON
+# body: the old cork(lambda res: res.send(...)) round trip through the cork
+# callback against cork_send doing it in one socketify_res_cork_send_int_code
+# call. Responses with headers or cookies still take the cork callback.
+# A real server is started on PORT and requested over keep-alive, only the
+# cork_send call itself is timed.
+#
+#   PYTHONPATH=. python bench/cork_send.py
+import asyncio
+import multiprocessing
+import http.client
+from statistics import median
+from time import perf_counter_ns
+
+from socketify_extra import Socketify
+
+PORT = 8766
+ITERATIONS = 20_000
+
+BODY = b'{"ok": true}'
+
+timings = {"cork_lambda": [], "cork_send": []}
+served = [0]
+
+
+async def cork_lambda(res, req):
+    await asyncio.sleep(0)
+    start = perf_counter_ns()
+    res.cork(lambda res: res.send(BODY, b"application/json", 201))
+    timings["cork_lambda"].append(perf_counter_ns() - start)
+    done(res)
+
+
+async def cork_send(res, req):
+    await asyncio.sleep(0)
+    start = perf_counter_ns()
+    res.cork_send(BODY, b"application/json", 201)
+    timings["cork_send"].append(perf_counter_ns() - start)
+    done(res)
+
+
+def done(res):
+    served[0] += 1
+    if served[0] == ITERATIONS * len(timings):
+        res.app.close()
+
+
+def client():
+    connection = http.client.HTTPConnection("127.0.0.1", PORT)
+    # alternated so both paths see the same machine noise
+    for _ in range(ITERATIONS):
+        for path in ("/cork_lambda", "/cork_send"):
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            assert response.status == 201
+    connection.close()
+
+
+def main():
+    app = Socketify()
+    app.get("/cork_lambda", cork_lambda)
+    app.get("/cork_send", cork_send)
+    app.listen(PORT, lambda config: multiprocessing.Process(target=client, daemon=True).start())
+    app.run()
+
+    # the socket write when the cork ends dominates and varies a lot, medians
+    cork_lambda_time = median(timings["cork_lambda"])
+    cork_send_time = median(timings["cork_send"])
+    print("%d requests each, median" % ITERATIONS)
+    print("cork lambda  %.0f ns/request" % cork_lambda_time)
+    print("cork_send    %.0f ns/request" % cork_send_time)
+    print("saved        %.1f%%" % ((1 - cork_send_time / cork_lambda_time) * 100))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Per request Python overhead of the HTTP dispatch, before and after specializing
+# the dispatcher at registration time.
+#
+#   PYTHONPATH=. python bench/dispatch.py
+import inspect
+import timeit
+
+from socketify_extra import Socketify, Response, Request
+from socketify_extra.uws import ffi
+from socketify_extra.dispatch import create_dispatcher
+
+ITERATIONS = 1_000_000
+
+
+def health(res, req):
+    pass
+
+
+def legacy_dispatch(res, req, user_data):
+    # what uws_generic_method_handler used to do for every request
+    if user_data != ffi.NULL:
+        (handler, app) = ffi.from_handle(user_data)
+        app.loop.is_idle = False
+        response = Response(res, app)
+        request = Request(req, app)
+        try:
+            if inspect.iscoroutinefunction(handler):
+                response.grab_aborted_handler()
+                response.run_async(handler(response, request))
+            else:
+                handler(response, request)
+        except Exception as err:
+            response.grab_aborted_handler()
+            app.trigger_error(err, response, request)
+
+
+def specialized_dispatch(res, req, user_data):
+    # what uws_generic_dispatch_handler does now
+    if user_data != ffi.NULL:
+        ffi.from_handle(user_data)(res, req)
+
+
+def main():
+    app = Socketify()
+    legacy_data = ffi.new_handle((health, app))
+    specialized_data = ffi.new_handle(create_dispatcher(app, health))
+
+    legacy = timeit.timeit(
+        lambda: legacy_dispatch(ffi.NULL, ffi.NULL, legacy_data), number=ITERATIONS
+    )
+    specialized = timeit.timeit(
+        lambda: specialized_dispatch(ffi.NULL, ffi.NULL, specialized_data),
+        number=ITERATIONS,
+    )
+    print("legacy      %.0f ns/request" % (legacy / ITERATIONS * 1e9))
+    print("specialized %.0f ns/request" % (specialized / ITERATIONS * 1e9))
+    print("saved       %.1f%%" % ((1 - specialized / legacy) * 100))
+
+
+if __name__ == "__main__":
+    main()
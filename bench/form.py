@@ -0,0 +1,61 @@
+# Parsing a urlencoded form with 150 fields, the old get_form_urlencoded
+# (parse_qs on bytes, decode every key, unquote_plus every value a second
+# time) against parse_urlencoded and the incremental FormParser.
+#
+#   PYTHONPATH=. python bench/form.py
+import timeit
+from urllib.parse import parse_qs, unquote_plus, urlencode
+
+from socketify_extra.streams import Body
+from socketify_extra.forms import parse_urlencoded, FormParser
+
+ITERATIONS = 5_000
+CHUNK_SIZE = 1024
+
+FIELDS = (
+    [("name", "Jorg Muller"), ("email", "jorg@example.com"), ("comment", "a+b=c & d")]
+    + [("item_%d" % i, "value %d" % i) for i in range(100)]
+    + [("tag", "tag%d" % i) for i in range(47)]
+)
+BODY = Body(urlencode(FIELDS).encode("utf-8"))
+
+
+def old(encoding="utf-8"):
+    result = {}
+    parsed = parse_qs(bytes(BODY), encoding=encoding)
+    for key in parsed:
+        value = parsed[key]
+        result[key.decode(encoding)] = unquote_plus(value[len(value) - 1].decode(encoding))
+    return result
+
+
+def single_pass():
+    return parse_urlencoded(BODY)
+
+
+def streaming():
+    parser = FormParser()
+    items = []
+    for offset in range(0, len(BODY), CHUNK_SIZE):
+        items += parser.feed(BODY[offset : offset + CHUNK_SIZE])
+    items += parser.close()
+    return items
+
+
+def main():
+    assert single_pass().multi_items() == streaming() == FIELDS
+    # the old parser unquoted twice, "a+b=c & d" came back as "a b=c & d", and
+    # any non ascii value made parse_qs raise so the whole form was None
+    assert old()["comment"] != dict(FIELDS)["comment"]
+    old_time = timeit.timeit(old, number=ITERATIONS)
+    single_time = timeit.timeit(single_pass, number=ITERATIONS)
+    streaming_time = timeit.timeit(streaming, number=ITERATIONS)
+    print("form %d fields, %d bytes" % (len(FIELDS), len(BODY)))
+    print("parse_qs          %.0f ns/request" % (old_time / ITERATIONS * 1e9))
+    print("parse_urlencoded  %.0f ns/request" % (single_time / ITERATIONS * 1e9))
+    print("FormParser        %.0f ns/request" % (streaming_time / ITERATIONS * 1e9))
+    print("saved             %.1f%%" % ((1 - single_time / old_time) * 100))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Time spent inside a handler answering with a status, 10 headers and a small
+# body: one uws_res_write_header call per header straight through lib,
+# write_status/write_header, and write_status/write_headers with a HeaderSet
+# packed once at import time into a native socketify_header list, written with
+# the status by one socketify_res_write_int_status_with_headers call.
+# A real server is started on PORT and requested over keep-alive, only the
+# handler itself is timed.
+#
+#   PYTHONPATH=. python bench/headers.py
+import threading
+import http.client
+from time import perf_counter_ns
+
+from socketify_extra import Socketify, HeaderSet
+from socketify_extra.uws import lib
+
+PORT = 8765
+ITERATIONS = 20_000
+
+HEADERS = [
+    (b"Content-Type", b"application/json"),
+    (b"Cache-Control", b"no-store"),
+    (b"X-Request-Id", b"5d1c0c2a-6f0e-4c4f-9d2b-1a6b3f3e7c11"),
+    (b"X-Frame-Options", b"DENY"),
+    (b"X-Content-Type-Options", b"nosniff"),
+    (b"Referrer-Policy", b"no-referrer"),
+    (b"Vary", b"Accept-Encoding"),
+    (b"Access-Control-Allow-Origin", b"*"),
+    (b"Strict-Transport-Security", b"max-age=63072000"),
+    (b"Server-Timing", b"app;dur=0.1"),
+]
+BODY = b'{"ok": true}'
+HEADER_SET = HeaderSet.compile(HEADERS)
+
+timings = {"per_header": 0, "write_header": 0, "header_set": 0}
+served = [0]
+
+
+def per_header(res, req):
+    start = perf_counter_ns()
+    lib.socketify_res_write_int_status(res.app.SSL, res.res, 200)
+    for name, value in HEADERS:
+        lib.uws_res_write_header(
+            res.app.SSL, res.res, name, len(name), value, len(value)
+        )
+    lib.uws_res_end(res.app.SSL, res.res, BODY, len(BODY), 0)
+    timings["per_header"] += perf_counter_ns() - start
+    done(res)
+
+
+def write_header(res, req):
+    start = perf_counter_ns()
+    res.write_status(200)
+    for name, value in HEADERS:
+        res.write_header(name, value)
+    res.end(BODY)
+    timings["write_header"] += perf_counter_ns() - start
+    done(res)
+
+
+def header_set(res, req):
+    start = perf_counter_ns()
+    res.write_status(200).write_headers(HEADER_SET).end(BODY)
+    timings["header_set"] += perf_counter_ns() - start
+    done(res)
+
+
+def done(res):
+    served[0] += 1
+    if served[0] == ITERATIONS * len(timings):
+        res.app.close()
+
+
+def client():
+    connection = http.client.HTTPConnection("127.0.0.1", PORT)
+    for path in ("/per_header", "/write_header", "/header_set"):
+        for _ in range(ITERATIONS):
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            assert response.getheader("X-Frame-Options") == "DENY"
+    connection.close()
+
+
+def main():
+    app = Socketify()
+    app.get("/per_header", per_header)
+    app.get("/write_header", write_header)
+    app.get("/header_set", header_set)
+    app.listen(PORT, lambda config: threading.Thread(target=client, daemon=True).start())
+    app.run()
+
+    print("%d headers, %d requests each" % (len(HEADERS), ITERATIONS))
+    print("per header   %.0f ns/request" % (timings["per_header"] / ITERATIONS))
+    print("write_header %.0f ns/request" % (timings["write_header"] / ITERATIONS))
+    print("header set   %.0f ns/request" % (timings["header_set"] / ITERATIONS))
+    print("saved        %.1f%%" % ((1 - timings["header_set"] / timings["per_header"]) * 100))
+
+
+if __name__ == "__main__":
+    main()
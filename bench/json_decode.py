@@ -0,0 +1,48 @@
+# Decoding a 30 KB JSON request body, the old path (bytes -> str -> loads)
+# against JsonSerializer handing the raw Body to each installed decoder.
+#
+#   PYTHONPATH=. python bench/json_decode.py
+import json
+import timeit
+import importlib
+
+from socketify_extra.streams import Body
+from socketify_extra.serializers import JsonSerializer
+
+ITERATIONS = 5_000
+
+BODY = Body(
+    json.dumps(
+        [{"id": i, "name": "user %d" % i, "tags": ["a", "b"], "score": i / 3} for i in range(400)]
+    ).encode("utf-8")
+)
+
+
+def main():
+    print("body %d bytes" % len(BODY))
+    for name in ("json", "orjson", "msgspec.json"):
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            print("%-12s not installed" % name)
+            continue
+        serializer = JsonSerializer(module)
+        expected = json.loads(bytes(BODY))
+        assert serializer.decode(BODY) == expected
+        text_time = timeit.timeit(
+            lambda: serializer.loads(BODY.getvalue().decode("utf-8")), number=ITERATIONS
+        )
+        raw_time = timeit.timeit(lambda: serializer.decode(BODY), number=ITERATIONS)
+        print(
+            "%-12s str %7.0f ns  raw %7.0f ns  saved %.1f%%"
+            % (
+                name,
+                text_time / ITERATIONS * 1e9,
+                raw_time / ITERATIONS * 1e9,
+                (1 - raw_time / text_time) * 100,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
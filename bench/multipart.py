@@ -0,0 +1,103 @@
+# Throughput of multipart/form-data uploads from 1 KB to 1 GB fed in 64 KB
+# chunks, the bare MultipartParser and the full MultipartReader which spools
+# file parts over 1 MB to a temporary file from the loop executor.
+#
+#   PYTHONPATH=. python bench/multipart.py [max size in MB]
+import sys
+import time
+import asyncio
+
+from socketify_extra.multipart import MultipartParser, MultipartReader, UploadFile
+
+CHUNK_SIZE = 64 * 1024
+SIZES = (1024, 1024 * 1024, 64 * 1024 * 1024, 1024 * 1024 * 1024)
+
+BOUNDARY = b"----socketifyBenchBoundary1234"
+CONTENT_TYPE = "multipart/form-data; boundary=" + BOUNDARY.decode()
+HEAD = (
+    b"--" + BOUNDARY + b"\r\n"
+    b'Content-Disposition: form-data; name="title"\r\n\r\nbenchmark\r\n'
+    b"--" + BOUNDARY + b"\r\n"
+    b'Content-Disposition: form-data; name="file"; filename="upload.bin"\r\n'
+    b"Content-Type: application/octet-stream\r\n\r\n"
+)
+TAIL = b"\r\n--" + BOUNDARY + b"--\r\n"
+BLOCK = bytes(range(256)) * (CHUNK_SIZE // 256)
+
+
+def chunks(size):
+    yield HEAD
+    remaining = size
+    while remaining > 0:
+        if remaining >= CHUNK_SIZE:
+            yield BLOCK
+        else:
+            yield BLOCK[:remaining]
+        remaining -= CHUNK_SIZE
+    yield TAIL
+
+
+def parse(size):
+    parser = MultipartParser(BOUNDARY)
+    received = 0
+    for chunk in chunks(size):
+        for event, value in parser.feed(chunk):
+            if event == "data":
+                received += len(value)
+    parser.close()
+    return received
+
+
+async def read(size):
+    async def stream():
+        for chunk in chunks(size):
+            yield chunk
+
+    received = 0
+    async for part in MultipartReader(stream(), CONTENT_TYPE):
+        if isinstance(part, UploadFile):
+            received += part.size
+            await part.close()
+        else:
+            received += len(part.value)
+    return received
+
+
+def format_size(size):
+    if size >= 1024 * 1024:
+        return "%d MB" % (size // (1024 * 1024))
+    return "%d KB" % (size // 1024)
+
+
+def measure(function, size):
+    repeat = max(1, (64 * 1024 * 1024) // size)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(size)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    max_size = SIZES[-1]
+    if len(sys.argv) > 1:
+        max_size = int(sys.argv[1]) * 1024 * 1024
+    loop = asyncio.new_event_loop()
+    for size in SIZES:
+        if size > max_size:
+            break
+        assert parse(size) == size + len(b"benchmark")
+        parse_time = measure(parse, size)
+        read_time = measure(lambda size: loop.run_until_complete(read(size)), size)
+        print(
+            "%-8s parser %8.1f MB/s  reader %8.1f MB/s"
+            % (
+                format_size(size),
+                size / parse_time / (1024 * 1024),
+                size / read_time / (1024 * 1024),
+            )
+        )
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# Query string handling on a long search url, parse_qs over the whole string
+# (what get_queries did) against QueryParams reading only the keys a handler
+# actually uses.
+#
+#   PYTHONPATH=. python bench/query.py
+import timeit
+from urllib.parse import parse_qs
+
+from socketify_extra.datastructures import QueryParams
+
+ITERATIONS = 100_000
+
+QUERY = "&".join(
+    ["q=python+web+framework", "page=3", "sort=relevance"]
+    + ["facet=category%%3A%d" % i for i in range(20)]
+    + ["utm_%d=campaign+%d" % (i, i) for i in range(20)]
+)
+
+
+def eager():
+    query = parse_qs(QUERY, encoding="utf-8")
+    return (query["q"][0], int(query["page"][0]))
+
+
+def lazy():
+    query = QueryParams(QUERY)
+    return (query.get_first("q"), query.get_int("page"))
+
+
+def main():
+    assert eager() == lazy()
+    eager_time = timeit.timeit(eager, number=ITERATIONS)
+    lazy_time = timeit.timeit(lazy, number=ITERATIONS)
+    print("query string %d bytes, 2 keys read" % len(QUERY))
+    print("parse_qs    %.0f ns/request" % (eager_time / ITERATIONS * 1e9))
+    print("QueryParams %.0f ns/request" % (lazy_time / ITERATIONS * 1e9))
+    print("saved       %.1f%%" % ((1 - lazy_time / eager_time) * 100))
+
+
+if __name__ == "__main__":
+    main()
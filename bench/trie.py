@@ -0,0 +1,52 @@
+# Python side routing cost for typed routes: a regex list matched on every
+# request (the any("/*") + re.match workaround), the trie router walking its
+# nodes and the trie router answering from its per url cache. Native uWS
+# patterns (:id) are matched in C++ and add no Python time before the handler,
+# the numbers below are what the Python routers add on top of that.
+#
+#   PYTHONPATH=. python bench/trie.py
+import re
+import timeit
+
+from socketify_extra import Socketify
+from socketify_extra.trie import TrieRouter
+
+ITERATIONS = 200_000
+ROUTES = 50
+
+
+def handler(res, req):
+    pass
+
+
+def main():
+    app = Socketify()
+    trie = TrieRouter(app, cache_size=0)
+    cached = TrieRouter(app)
+    patterns = []
+    for index in range(ROUTES):
+        path = "/feature%d/items/{id:int}/files/{path:path}" % index
+        trie.add_route(path, handler)
+        cached.add_route(path, handler)
+        patterns.append(
+            re.compile(r"^/feature%d/items/(-?[0-9]+)/files/(.+)$" % index)
+        )
+
+    url = "/feature%d/items/42/files/a/b.txt" % (ROUTES - 1)
+
+    def regex_match():
+        for pattern in patterns:
+            match = pattern.match(url)
+            if match is not None:
+                return (int(match.group(1)), match.group(2))
+
+    regex_time = timeit.timeit(regex_match, number=ITERATIONS)
+    trie_time = timeit.timeit(lambda: trie.match("GET", url), number=ITERATIONS)
+    cached_time = timeit.timeit(lambda: cached.match("GET", url), number=ITERATIONS)
+    print("regex list  %.0f ns/request" % (regex_time / ITERATIONS * 1e9))
+    print("trie        %.0f ns/request" % (trie_time / ITERATIONS * 1e9))
+    print("trie cached %.0f ns/request" % (cached_time / ITERATIONS * 1e9))
+
+
+if __name__ == "__main__":
+    main()
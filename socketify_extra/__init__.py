@@ -1,4 +1,4 @@
-from .dataclasses import AppListenOptions, AppOptions
+from .dataclasses import AppListenOptions, AppOptions, CachePolicy
 from .tasks import TaskFactory, create_task, RequestTask
 
 from .application import App as Socketify
@@ -13,10 +13,13 @@ from .response import RequestResponseFactory
 from .request import AppRequest as Request
 from .websocket import WebSocket as Websocket
 from .loop import Loop
+from .datastructures import Headers, FormData, HeaderSet
+from .trie import TrieRouter
+from .multipart import MultipartReader, FormField, UploadFile
 
 from .helpers import (
     sendfile, middleware, 
-    MiddlewareRouter
+    MiddlewareRouter, HostRouter, DecoratorRouter
 )
 
 
@@ -7,15 +7,20 @@ import traceback
 from .uws import ffi, lib
 from .loop import Loop
 from .helpers import static_route
-from .helpers import DecoratorRouter
+from .helpers import DecoratorRouter, HostRouter
+from .routing import RouteTable
+from .trie import TrieRouter
+from .cache import ResponseCache
+from .cookies import CookieSigner
+from .serializers import JsonSerializer
+from .static_response import StaticResponse
 from .response import RequestResponseFactory
 from .websocket import WebSocketFactory, WSBehaviorHandlers
 from .background import OpCode
 
 
 from .uwebsocket_cffi import (
-    uws_generic_factory_method_handler, uws_generic_method_handler_with_extension,
-    uws_generic_method_handler, uws_missing_server_name,
+    uws_missing_server_name,
     uws_websocket_factory_upgrade_handler, uws_websocket_factory_open_handler,
     uws_websocket_upgrade_handler_with_extension, uws_websocket_upgrade_handler,
     uws_websocket_factory_message_handler, uws_websocket_ping_handler_with_extension,
@@ -40,6 +45,12 @@ class App:
         websocket_factory_max_items=0,
         task_factory_max_items=100_000,
         lifespan=True,
+        cache_max_bytes=32 * 1024 * 1024,
+        auto_methods=False,
+        cookie_secret=None,
+        max_body_size=None,
+        decompress=False,
+        max_decompressed_size=64 * 1024 * 1024,
     ):
 
         socket_options_ptr = ffi.new("struct us_socket_context_options_t *")
@@ -128,6 +139,16 @@ class App:
             raise RuntimeError("Failed to create connection")
 
         self.handlers = []
+        self._routes = RouteTable(self)
+        # synthesize HEAD, OPTIONS and 405 responses from the route table on listen
+        self._auto_methods = auto_methods
+        if max_body_size is not None and max_body_size < 0:
+            raise RuntimeError("max_body_size must be 0 or greater")
+        # default for every route, answered with 413 before the handler runs
+        self._max_body_size = max_body_size
+        # gzip/deflate (br/zstd when installed) request bodies inflated while read
+        self._decompress = decompress
+        self._max_decompressed_size = max_decompressed_size
         self.error_handler = None
         self._missing_server_handler = None
 
@@ -145,12 +166,17 @@ class App:
             self._ws_factory = WebSocketFactory(self, websocket_factory_max_items)
         else:
             self._ws_factory = None
-        self._json_serializer = json
+        self._json_serializer = JsonSerializer(json)
         self._request_extension = None
         self._response_extension = None
         self._ws_extension = None
         self._on_start_handler = None
         self._on_shutdown_handler = None
+        self._cache_max_bytes = cache_max_bytes
+        self._response_cache = None
+        self._cookie_signer = (
+            CookieSigner(cookie_secret) if cookie_secret is not None else None
+        )
 
     def on_start(self, method: callable):
         self._on_start_handler = method
@@ -163,6 +189,21 @@ class App:
     def router(self, prefix: str = "", *middlewares):
         return DecoratorRouter(self, prefix, middlewares)
 
+    def trie_router(self, prefix: str = "", *middlewares, cache_size=1024):
+        # {id:int}, {slug:[a-z-]+} and {path:path} segments matched behind App.any
+        return TrieRouter(self, prefix, middlewares, cache_size=cache_size)
+
+    def mount(self, router, prefix: str = ""):
+        # register every route of router (and the ones added later) under prefix
+        router._mounts.append((self, prefix))
+        for path, handler, methods, middlewares, options in router.routes:
+            self.add_route(f"{prefix}{path}", handler, methods, middlewares, **options)
+        return router
+
+    def host(self, hostname, *middlewares):
+        # routes only matched when the Host header is hostname (port ignored)
+        return HostRouter(self, hostname, *middlewares)
+
     def register(self, extension):
         if self._request_extension is None:
             self._request_extension = AppExtension()
@@ -180,225 +221,75 @@ class App:
         if self._ws_factory is not None and not self._ws_extension.empty:
             self._ws_factory.update_extensions()
 
+    def get_response_cache(self):
+        # shared by every route registered with a CachePolicy
+        if self._response_cache is None:
+            self._response_cache = ResponseCache(self._cache_max_bytes)
+        return self._response_cache
+
+    def get_cookie_signer(self):
+        if self._cookie_signer is None:
+            raise RuntimeError("Signed cookies need App(cookie_secret=...)")
+        return self._cookie_signer
+
     def template(self, template_engine):
         self._template = template_engine
 
     def json_serializer(self, json_serializer):
+        # json, orjson, msgspec.json or any module with dumps/loads
+        if not isinstance(json_serializer, JsonSerializer):
+            json_serializer = JsonSerializer(json_serializer)
         self._json_serializer = json_serializer
 
     def static(self, route, directory):
         static_route(self, route, directory)
         return self
 
-    def get(self, path, handler):
-        user_data = ffi.new_handle((handler, self))
-        self.handlers.append(user_data)  # Keep alive handler
-        if self._factory:
-            handler = uws_generic_factory_method_handler
-        elif self._response_extension and (
-            not self._response_extension.empty or not self._request_extension.empty
-        ):
-            handler = uws_generic_method_handler_with_extension
-        else:
-            handler = uws_generic_method_handler
-
-        lib.uws_app_get(
-            self.SSL,
-            self.app,
-            path.encode("utf-8"),
-            handler,
-            user_data,
+    def static_response(self, path, body, status=200, headers=None, methods=("GET",)):
+        # fixed payloads (health checks, robots.txt) encoded once, see StaticResponse
+        self._routes.add_static(
+            methods, path, StaticResponse(self, body, status, headers)
         )
         return self
 
-    def post(self, path, handler):
-        user_data = ffi.new_handle((handler, self))
-        self.handlers.append(user_data)  # Keep alive handler
-        if self._factory:
-            handler = uws_generic_factory_method_handler
-        elif self._response_extension and (
-            not self._response_extension.empty or not self._request_extension.empty
-        ):
-            handler = uws_generic_method_handler_with_extension
-        else:
-            handler = uws_generic_method_handler
-
-        lib.uws_app_post(
-            self.SSL,
-            self.app,
-            path.encode("utf-8"),
-            handler,
-            user_data,
-        )
-        return self
+    @property
+    def routes(self):
+        return list(self._routes.routes)
 
-    def options(self, path, handler):
-        user_data = ffi.new_handle((handler, self))
-        self.handlers.append(user_data)  # Keep alive handler
-        if self._factory:
-            handler = uws_generic_factory_method_handler
-        elif self._response_extension and (
-            not self._response_extension.empty or not self._request_extension.empty
-        ):
-            handler = uws_generic_method_handler_with_extension
-        else:
-            handler = uws_generic_method_handler
-
-        lib.uws_app_options(
-            self.SSL,
-            self.app,
-            path.encode("utf-8"),
-            handler,
-            user_data,
-        )
+    def add_route(self, path, handler, methods=("GET",), middlewares=(), **options):
+        # routes are collected and registered with uWS in one pass on listen
+        self._routes.add(methods, path, handler, middlewares, **options)
         return self
 
-    def delete(self, path, handler):
-        user_data = ffi.new_handle((handler, self))
-        self.handlers.append(user_data)  # Keep alive handler
-        if self._factory:
-            handler = uws_generic_factory_method_handler
-        elif self._response_extension and (
-            not self._response_extension.empty or not self._request_extension.empty
-        ):
-            handler = uws_generic_method_handler_with_extension
-        else:
-            handler = uws_generic_method_handler
-
-        lib.uws_app_delete(
-            self.SSL,
-            self.app,
-            path.encode("utf-8"),
-            handler,
-            user_data,
-        )
-        return self
+    def get(self, path, handler, **options):
+        return self.add_route(path, handler, ("GET",), **options)
 
-    def patch(self, path, handler):
-        user_data = ffi.new_handle((handler, self))
-        self.handlers.append(user_data)  # Keep alive handler
-        if self._factory:
-            handler = uws_generic_factory_method_handler
-        elif self._response_extension and (
-            not self._response_extension.empty or not self._request_extension.empty
-        ):
-            handler = uws_generic_method_handler_with_extension
-        else:
-            handler = uws_generic_method_handler
-
-        lib.uws_app_patch(
-            self.SSL,
-            self.app,
-            path.encode("utf-8"),
-            handler,
-            user_data,
-        )
-        return self
+    def post(self, path, handler, **options):
+        return self.add_route(path, handler, ("POST",), **options)
 
-    def put(self, path, handler):
-        user_data = ffi.new_handle((handler, self))
-        self.handlers.append(user_data)  # Keep alive handler
-        if self._factory:
-            handler = uws_generic_factory_method_handler
-        elif self._response_extension and (
-            not self._response_extension.empty or not self._request_extension.empty
-        ):
-            handler = uws_generic_method_handler_with_extension
-        else:
-            handler = uws_generic_method_handler
-
-        lib.uws_app_put(
-            self.SSL,
-            self.app,
-            path.encode("utf-8"),
-            handler,
-            user_data,
-        )
-        return self
+    def options(self, path, handler, **options):
+        return self.add_route(path, handler, ("OPTIONS",), **options)
 
-    def head(self, path, handler):
-        user_data = ffi.new_handle((handler, self))
-        self.handlers.append(user_data)  # Keep alive handler
-        if self._factory:
-            handler = uws_generic_factory_method_handler
-        elif self._response_extension and (
-            not self._response_extension.empty or not self._request_extension.empty
-        ):
-            handler = uws_generic_method_handler_with_extension
-        else:
-            handler = uws_generic_method_handler
-
-        lib.uws_app_head(
-            self.SSL,
-            self.app,
-            path.encode("utf-8"),
-            handler,
-            user_data,
-        )
-        return self
+    def delete(self, path, handler, **options):
+        return self.add_route(path, handler, ("DELETE",), **options)
 
-    def connect(self, path, handler):
-        user_data = ffi.new_handle((handler, self))
-        self.handlers.append(user_data)  # Keep alive handler
-        if self._factory:
-            handler = uws_generic_factory_method_handler
-        elif self._response_extension and (
-            not self._response_extension.empty or not self._request_extension.empty
-        ):
-            handler = uws_generic_method_handler_with_extension
-        else:
-            handler = uws_generic_method_handler
-
-        lib.uws_app_connect(
-            self.SSL,
-            self.app,
-            path.encode("utf-8"),
-            handler,
-            user_data,
-        )
-        return self
+    def patch(self, path, handler, **options):
+        return self.add_route(path, handler, ("PATCH",), **options)
 
-    def trace(self, path, handler):
-        user_data = ffi.new_handle((handler, self))
-        self.handlers.append(user_data)  # Keep alive handler
-        if self._factory:
-            handler = uws_generic_factory_method_handler
-        elif self._response_extension and (
-            not self._response_extension.empty or not self._request_extension.empty
-        ):
-            handler = uws_generic_method_handler_with_extension
-        else:
-            handler = uws_generic_method_handler
-
-        lib.uws_app_trace(
-            self.SSL,
-            self.app,
-            path.encode("utf-8"),
-            handler,
-            user_data,
-        )
-        return self
+    def put(self, path, handler, **options):
+        return self.add_route(path, handler, ("PUT",), **options)
 
-    def any(self, path, handler):
-        user_data = ffi.new_handle((handler, self))
-        self.handlers.append(user_data)  # Keep alive handler
-        if self._factory:
-            handler = uws_generic_factory_method_handler
-        elif self._response_extension and (
-            not self._response_extension.empty or not self._request_extension.empty
-        ):
-            handler = uws_generic_method_handler_with_extension
-        else:
-            handler = uws_generic_method_handler
-
-        lib.uws_app_any(
-            self.SSL,
-            self.app,
-            path.encode("utf-8"),
-            handler,
-            user_data,
-        )
-        return self
+    def head(self, path, handler, **options):
+        return self.add_route(path, handler, ("HEAD",), **options)
+
+    def connect(self, path, handler, **options):
+        return self.add_route(path, handler, ("CONNECT",), **options)
+
+    def trace(self, path, handler, **options):
+        return self.add_route(path, handler, ("TRACE",), **options)
+
+    def any(self, path, handler, **options):
+        return self.add_route(path, handler, ("*",), **options)
 
     def get_native_handle(self):
         return lib.uws_get_native_handle(self.SSL, self.app)
@@ -431,7 +322,7 @@ class App:
         elif message is None:
             message_data = b""
         else:
-            message_data = self._json_serializer.dumps(message).encode("utf-8")
+            message_data = self._json_serializer.encode(message)
 
         return bool(
             lib.uws_publish(
@@ -735,6 +626,9 @@ class App:
             if self._on_start_handler:
                 self.loop.run_until_complete(task_wrapper(self._on_start_handler))
 
+        # register all collected routes before listening
+        self._routes.commit()
+
         # actual listen to server
         self._listen_handler = handler
         if port_or_options is None:
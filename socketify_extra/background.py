@@ -60,6 +60,15 @@ def uws_generic_aborted_handler(response, user_data):
         except Exception:
             pass
 
+@ffi.callback("void(uws_res_t*, void*)")
+def uws_generic_body_limit_handler(response, user_data):
+    if user_data != ffi.NULL:
+        try:
+            res = ffi.from_handle(user_data)
+            res.trigger_body_limit()
+        except Exception:
+            pass
+
 @ffi.callback("bool(uws_res_t*, uintmax_t, void*)")
 def uws_generic_on_writable_handler(res, offset, user_data):
     if user_data != ffi.NULL:
@@ -75,6 +84,27 @@ def uws_generic_on_data_handler(res, chunk, chunk_length, is_end, user_data):
     if user_data != ffi.NULL:
         res = ffi.from_handle(user_data)
         res.app.loop.is_idle = False
+        if res._body_decoder is not None:
+            # inflated right away, the view is only valid during this callback
+            if chunk == ffi.NULL:
+                data = b""
+            else:
+                data = memoryview(ffi.buffer(chunk, chunk_length))
+            res.trigger_encoded_data(data, bool(is_end))
+            return
+        reader = res._body_reader
+        if reader is not None:
+            # get_data() copies from native memory, no intermediate bytes
+            if res.aborted:
+                return
+            try:
+                if chunk != ffi.NULL and chunk_length:
+                    reader.write(chunk, chunk_length)
+                if is_end:
+                    reader.end()
+            except Exception as err:
+                logging.error("Error on data handler %s" % str(err))
+            return
         if chunk == ffi.NULL:
             data = None
         else:
@@ -82,6 +112,27 @@ def uws_generic_on_data_handler(res, chunk, chunk_length, is_end, user_data):
 
         res.trigger_data_handler(data, bool(is_end))
 
+
+@ffi.callback("void(uws_res_t*, const char*, size_t, bool, void*)")
+def uws_generic_on_data_with_limit_handler(res, chunk, chunk_length, is_end, user_data):
+    # the running total libsocketify keeps in socketify_res_on_data_with_limit,
+    # for binaries built before it
+    if user_data != ffi.NULL:
+        response = ffi.from_handle(user_data)
+        if response.aborted:
+            return
+        response._body_size += chunk_length
+        if response._body_size > response._max_body_size:
+            ssl = response.app.SSL
+            lib.uws_res_write_status(ssl, res, b"413 Payload Too Large", 21)
+            lib.uws_res_end_without_body(ssl, res, 1)
+            try:
+                response.trigger_body_limit()
+            except Exception:
+                pass
+            return
+        uws_generic_on_data_handler(res, chunk, chunk_length, is_end, user_data)
+
 @ffi.callback("void(uws_res_t*, void*)")
 def uws_generic_cork_handler(res, user_data):
     if user_data != ffi.NULL:
@@ -110,6 +161,22 @@ def uws_req_for_each_header_handler(
             return
 
 
+@ffi.callback("void(const char*, size_t, const char*, size_t, void*)")
+def uws_req_raw_header_handler(
+    header_name, header_name_size, header_value, header_value_size, user_data
+):
+    # raw bytes like socketify_asgi_request, Headers decodes on access
+    if user_data != ffi.NULL:
+        raw = ffi.from_handle(user_data)
+        name = ffi.unpack(header_name, header_name_size)
+        value = ffi.unpack(header_value, header_value_size)
+        values = raw.get(name, None)
+        if values is None:
+            raw[name] = [value]
+        else:
+            values.append(value)
+
+
 # for websocket.py
 @ffi.callback("void(const char*, size_t, void*)")
 def uws_req_for_each_topic_handler(topic, topic_size, user_data):
@@ -0,0 +1,263 @@
+import time
+from collections import OrderedDict
+
+from .uws import ffi, lib
+from .datastructures import HeaderSet
+
+
+def encode_header_value(value):
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    return str(value).encode("utf-8")
+
+
+class CachedResponse:
+    __slots__ = (
+        "status", "headers", "content_type", "body", "expires", "size", "head"
+    )
+
+    def __init__(self, status, headers, content_type, body, expires):
+        self.status = status
+        self.headers = headers
+        self.content_type = content_type
+        self.body = body
+        self.expires = expires
+        self.size = len(body or b"") + len(content_type) + 64
+        for name, value in headers:
+            self.size += len(name) + len(value)
+        # compiled once, every hit writes the same headers
+        self.head = None
+        if headers:
+            self.head = HeaderSet(headers)
+
+    def send(self, response):
+        if response.aborted:
+            return
+        response.app.loop.is_idle = False
+        status = self.status
+        if self.head is not None:
+            # the status goes first, an int one in the same call as the list
+            response.write_status(status)
+            response.write_headers(self.head)
+        if response._head:
+            response.write_status(status)
+            if self.content_type:
+                response.write_header(b"Content-Type", self.content_type)
+            if response._pending_status is not None:
+                response._write_head()
+            if self.body is None:
+                lib.uws_res_end_without_body(response.app.SSL, response.res, 0)
+            else:
+                response._end_without_body_with_length(len(self.body))
+            return
+        if response._pending_status is not None:
+            response._write_head()
+        if isinstance(status, int):
+            lib.socketify_res_send_int_code(
+                response.app.SSL,
+                response.res,
+                ffi.NULL if self.body is None else self.body,
+                0 if self.body is None else len(self.body),
+                status,
+                self.content_type,
+                len(self.content_type),
+                0,
+            )
+        else:
+            lib.socketify_res_send(
+                response.app.SSL,
+                response.res,
+                ffi.NULL if self.body is None else self.body,
+                0 if self.body is None else len(self.body),
+                status,
+                len(status),
+                self.content_type,
+                len(self.content_type),
+                0,
+            )
+
+
+class ResponseRecorder:
+    # captures what the handler writes through AppResponse so it can be replayed
+    __slots__ = ("cache", "run", "ttl", "status", "headers", "cacheable")
+
+    def __init__(self, cache, run, ttl):
+        self.cache = cache
+        self.run = run
+        self.ttl = ttl
+        self.status = None
+        self.headers = []
+        self.cacheable = True
+
+    def write_status(self, status):
+        # uWS keeps the first status written, later ones never reach the wire
+        if self.status is None:
+            self.status = status
+
+    def write_header(self, name, value):
+        if isinstance(name, str):
+            name = name.encode("utf-8")
+        if name.lower() == b"set-cookie":
+            self.cacheable = False
+        self.headers.append((name, encode_header_value(value)))
+
+    def discard(self):
+        # streamed or otherwise not replayable response, the waiters run the
+        # handler themselves, AppResponse drops the recorder right after
+        self.cacheable = False
+        self.cache.resolve(self.run, None, None)
+
+    def finish(self, content_type, body):
+        if not self.cacheable:
+            # cookies or a streamed body must never be shared with other clients
+            self.cache.resolve(self.run, None, None)
+            return
+
+        status = self.status
+        if status is None:
+            status = 200
+        if isinstance(status, str):
+            status = status.encode("utf-8")
+        if isinstance(status, bytes):
+            try:
+                status = int(status.split(b" ", 1)[0])
+            except Exception:
+                pass
+
+        if content_type is None:
+            content_type = b""
+        elif isinstance(content_type, str):
+            content_type = content_type.encode("utf-8")
+
+        entry = CachedResponse(
+            status,
+            self.headers,
+            content_type,
+            body,
+            time.monotonic() + self.ttl,
+        )
+        # only successful responses are stored, waiters get whatever was sent
+        if isinstance(status, int) and 200 <= status < 300:
+            self.cache.resolve(self.run, entry, entry)
+        else:
+            self.cache.resolve(self.run, None, entry)
+
+    def abort(self):
+        self.cache.resolve(self.run, None, None)
+
+
+class PendingRun:
+    # one handler run in flight for a key and the responses waiting for it
+    __slots__ = ("key", "waiters", "timer")
+
+    def __init__(self, key):
+        self.key = key
+        # [(response, preserved request, resume), ...]
+        self.waiters = []
+        self.timer = None
+
+
+class ResponseCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        # key -> PendingRun for the handler run already in flight
+        self.pending = {}
+
+    def get(self, key):
+        entry = self.entries.get(key, None)
+        if entry is None:
+            return None
+        if entry.expires < time.monotonic():
+            self._remove(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def set(self, key, entry):
+        if entry.size > self.max_bytes:
+            return
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = entry
+        self.size += entry.size
+        # least recently used entries go first
+        while self.size > self.max_bytes:
+            (_, evicted) = self.entries.popitem(last=False)
+            self.size -= evicted.size
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def resolve(self, run, entry, shared):
+        if entry is not None:
+            self.set(run.key, entry)
+        if self.pending.get(run.key, None) is run:
+            del self.pending[run.key]
+        if run.timer is not None:
+            run.timer.cancel()
+            run.timer = None
+        waiters = run.waiters
+        run.waiters = []
+        for (waiter, request, resume) in waiters:
+            if waiter.aborted:
+                waiter._release()
+            elif shared is None:
+                # nothing shareable came out of that run (cookies, a stream, an
+                # abort or a timeout), every waiter runs the handler itself
+                waiter.cork(lambda res, request=request: resume(res, request))
+            else:
+                waiter.cork(shared.send)
+                waiter._release()
+
+
+def cache_prelude(cache, policy, resume):
+    # resume(response, request) runs the route handler for a waiter whose
+    # native request is gone, see dispatch.create_resume
+    vary = policy.vary
+    ttl = policy.ttl
+    wait_timeout = policy.wait_timeout
+
+    def prelude(response, request):
+        url = request.get_full_url()
+        if url is None:
+            return True
+        # GET and HEAD responses differ, so the method is part of the key
+        key = (request.get_method(), url)
+        if vary:
+            key = key + tuple(request.get_header(name) for name in vary)
+
+        entry = cache.get(key)
+        if entry is not None:
+            entry.send(response)
+            return False
+
+        run = cache.pending.get(key, None)
+        if run is not None:
+            # same request already running, share its response; the request is
+            # copied now in case the handler has to run for this one too
+            request.preserve()
+            response.grab_aborted_handler()
+            response._detached = True
+            run.waiters.append((response, request, resume))
+            return False
+
+        run = PendingRun(key)
+        # a leader that never answers must not hold its waiters forever
+        run.timer = response.app.loop.loop.call_later(
+            wait_timeout, cache.resolve, run, None, None
+        )
+        cache.pending[key] = run
+        response._recorder = ResponseRecorder(cache, run, ttl)
+        return True
+
+    return prelude
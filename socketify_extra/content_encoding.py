@@ -0,0 +1,159 @@
+import zlib
+
+
+# name -> module or None, a missing package is only looked up once
+optional_modules = {}
+
+
+def load_optional(*names):
+    if names in optional_modules:
+        return optional_modules[names]
+    module = None
+    for name in names:
+        try:
+            module = __import__(name)
+            break
+        except ImportError:
+            pass
+    optional_modules[names] = module
+    return module
+
+
+def load_brotli():
+    return load_optional("brotli", "brotlicffi")
+
+
+def load_zstandard():
+    return load_optional("zstandard")
+
+
+class ZlibStep:
+    # gzip and deflate, output is bounded with max_length so a small chunk can
+    # never inflate past the limit in memory
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self.obj = None
+
+    def decompress(self, data, limit):
+        obj = self.obj
+        if obj is None:
+            if self.encoding == "deflate" and data and (data[0] & 0x0F) != 8:
+                # raw deflate without the zlib header, sent by some clients
+                obj = zlib.decompressobj(-zlib.MAX_WBITS)
+            elif self.encoding == "deflate":
+                obj = zlib.decompressobj()
+            else:
+                obj = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            self.obj = obj
+
+        output = []
+        size = 0
+        while data:
+            chunk = obj.decompress(data, limit - size + 1)
+            size += len(chunk)
+            output.append(chunk)
+            if size > limit:
+                # BodyDecoder rejects it, nothing past limit + 1 is inflated
+                break
+            data = obj.unconsumed_tail
+            if not data and obj.eof and obj.unused_data and self.encoding == "gzip":
+                # concatenated gzip members
+                data = obj.unused_data
+                obj = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                self.obj = obj
+        return b"".join(output)
+
+    def finish(self):
+        if self.obj is not None and not self.obj.eof:
+            raise RuntimeError("Request body ended inside the %s stream" % self.encoding)
+
+
+class BrotliStep:
+    # the brotli bindings cannot bound output, the limit is checked per chunk
+    def __init__(self, brotli):
+        self.obj = brotli.Decompressor()
+
+    def decompress(self, data, limit):
+        return self.obj.process(data)
+
+    def finish(self):
+        if not self.obj.is_finished():
+            raise RuntimeError("Request body ended inside the br stream")
+
+
+class ZstdStep:
+    # zstandard cannot bound output either, the limit is checked per chunk
+    def __init__(self, zstandard):
+        self.obj = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data, limit):
+        return self.obj.decompress(data)
+
+    def finish(self):
+        if not self.obj.eof:
+            raise RuntimeError("Request body ended inside the zstd stream")
+
+
+def supported_encodings():
+    encodings = ["gzip", "deflate"]
+    if load_brotli() is not None:
+        encodings.append("br")
+    if load_zstandard() is not None:
+        encodings.append("zstd")
+    return encodings
+
+
+def create_step(encoding):
+    if encoding in ("gzip", "x-gzip"):
+        return ZlibStep("gzip")
+    if encoding == "deflate":
+        return ZlibStep("deflate")
+    if encoding == "br":
+        brotli = load_brotli()
+        if brotli is not None:
+            return BrotliStep(brotli)
+    elif encoding == "zstd":
+        zstandard = load_zstandard()
+        if zstandard is not None:
+            return ZstdStep(zstandard)
+    return None
+
+
+class BodyDecoder:
+    # decompresses a request body chunk by chunk as uWS delivers it, the
+    # total output is capped at max_size
+    __slots__ = ("steps", "max_size", "size", "too_large")
+
+    def __init__(self, steps, max_size):
+        self.steps = steps
+        self.max_size = max_size
+        self.size = 0
+        self.too_large = False
+
+    @classmethod
+    def create(cls, content_encoding, max_size):
+        # None for identity, RuntimeError for anything this build cannot decode
+        steps = []
+        for encoding in reversed(content_encoding.lower().split(",")):
+            encoding = encoding.strip()
+            if not encoding or encoding == "identity":
+                continue
+            step = create_step(encoding)
+            if step is None:
+                raise RuntimeError('"%s" Content-Encoding is not supported' % encoding)
+            steps.append(step)
+        if not steps:
+            return None
+        return cls(steps, max_size)
+
+    def decompress(self, data, is_end):
+        remaining = self.max_size - self.size
+        for step in self.steps:
+            data = step.decompress(data, remaining)
+            if len(data) > remaining:
+                self.too_large = True
+                raise RuntimeError("Decompressed request body too large")
+            if is_end:
+                step.finish()
+        self.size += len(data)
+        return data
@@ -0,0 +1,131 @@
+import hmac
+import hashlib
+import base64
+from datetime import datetime
+from collections import OrderedDict
+from urllib.parse import quote_plus, unquote_plus
+
+
+# RFC 6265 token characters, anything else is rejected in cookie names
+token_chars = frozenset(
+    "!#$%&'*+-.^_`|~0123456789"
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+)
+
+cookie_attributes = {
+    "expires": "Expires",
+    "path": "Path",
+    "comment": "Comment",
+    "domain": "Domain",
+    "max-age": "Max-Age",
+    "max_age": "Max-Age",
+    "secure": "Secure",
+    "httponly": "HttpOnly",
+    "version": "Version",
+    "samesite": "SameSite",
+}
+
+
+def unquote_cookie(value):
+    # double quoted values may carry backslash escapes like SimpleCookie output
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        value = value[1:-1]
+        if "\\" in value:
+            try:
+                value = value.encode("latin-1").decode("unicode_escape")
+            except Exception:  # not a valid escape sequence, keep it as sent
+                pass
+    return value
+
+
+def parse_cookie(header, name):
+    # scans the Cookie header for a single cookie, nothing else is decoded
+    if not header:
+        return None
+    for pair in header.split(";"):
+        (key, separator, value) = pair.partition("=")
+        if separator and key.strip() == name:
+            return unquote_cookie(value.strip())
+    return None
+
+
+def parse_cookies(header):
+    result = {}
+    if not header:
+        return result
+    for pair in header.split(";"):
+        (key, separator, value) = pair.partition("=")
+        if not separator:
+            continue
+        key = key.strip()
+        if key and key not in result:
+            result[key] = unquote_cookie(value.strip())
+    return result
+
+
+def serialize_cookie(name, value, options=None):
+    if not name or any(char not in token_chars for char in name):
+        raise RuntimeError('"%s" is not a valid cookie name' % name)
+
+    parts = ["%s=%s" % (name, value)]
+    if options:
+        for key, option in options.items():
+            attribute = cookie_attributes.get(key.lower(), None)
+            if attribute is None:
+                raise RuntimeError('"%s" is not a valid cookie option' % key)
+            if attribute in ("Secure", "HttpOnly"):
+                if option:
+                    parts.append(attribute)
+                continue
+            if attribute == "Expires" and isinstance(option, datetime):
+                option = option.strftime("%a, %d %b %Y %H:%M:%S GMT")
+            parts.append("%s=%s" % (attribute, option))
+    cookie = "; ".join(parts)
+    if "\r" in cookie or "\n" in cookie:
+        # values and options end up inside a Set-Cookie header line
+        raise RuntimeError('"%s" cookie contains a line break' % name)
+    return cookie.encode("utf-8")
+
+
+class CookieSigner:
+    # HMAC-SHA256 signed values, verified cookies are remembered so a session
+    # cookie sent on every request is only checked once
+    def __init__(self, secret, cache_size=1024):
+        if isinstance(secret, str):
+            secret = secret.encode("utf-8")
+        if not secret:
+            raise RuntimeError("cookie_secret must not be empty")
+        self.secret = secret
+        self.cache_size = cache_size
+        self._verified = OrderedDict()
+
+    def signature(self, name, value):
+        digest = hmac.new(
+            self.secret, ("%s=%s" % (name, value)).encode("utf-8"), hashlib.sha256
+        ).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+    def sign(self, name, value):
+        value = quote_plus(value)
+        return "%s.%s" % (value, self.signature(name, value))
+
+    def unsign(self, name, signed_value):
+        if signed_value is None:
+            return None
+        key = (name, signed_value)
+        verified = self._verified
+        value = verified.get(key, None)
+        if value is not None:
+            verified.move_to_end(key)
+            return value
+
+        (value, separator, signature) = signed_value.rpartition(".")
+        if not separator or not hmac.compare_digest(
+            signature.encode("utf-8"), self.signature(name, value).encode("ascii")
+        ):
+            return None
+        value = unquote_plus(value)
+        verified[key] = value
+        if len(verified) > self.cache_size:
+            verified.popitem(last=False)
+        return value
@@ -55,3 +55,22 @@ class AppOptions:
             raise RuntimeError("ssl_ciphers must be a str if specified")
         if not isinstance(self.ssl_prefer_low_memory_usage, int):
             raise RuntimeError("ssl_prefer_low_memory_usage must be an int")
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    ttl: float = 60
+    vary: tuple = ()
+    # how long concurrent misses wait for the run in flight before running
+    # the handler themselves
+    wait_timeout: float = 30
+
+    def __post_init__(self):
+        if not isinstance(self.ttl, (int, float)) or self.ttl <= 0:
+            raise RuntimeError("ttl must be a positive number of seconds")
+        if not isinstance(self.wait_timeout, (int, float)) or self.wait_timeout <= 0:
+            raise RuntimeError("wait_timeout must be a positive number of seconds")
+        # header names are looked up lower case
+        object.__setattr__(
+            self, "vary", tuple(name.lower() for name in (self.vary or ()))
+        )
@@ -0,0 +1,341 @@
+import struct
+from collections.abc import Mapping
+from urllib.parse import unquote_plus
+
+from .uws import ffi
+
+
+header_size = ffi.sizeof("socketify_header")
+uintptr = ffi.typeof("uintptr_t")
+
+
+def header_key(name):
+    # uWS already hands header names lower case, lookups only lower the query
+    if isinstance(name, str):
+        return name.lower().encode("latin-1")
+    if isinstance(name, bytes):
+        return name.lower()
+    raise KeyError(name)
+
+
+class Headers(Mapping):
+    # raw bytes from the request snapshot, values are only decoded when read
+    __slots__ = ("_raw", "_decoded")
+
+    def __init__(self, raw=None):
+        # lower case name -> [value, ...] in arrival order
+        self._raw = raw if raw is not None else {}
+        self._decoded = {}
+
+    @classmethod
+    def from_list(cls, headers):
+        raw = {}
+        for name, value in headers:
+            name = name.lower()
+            values = raw.get(name, None)
+            if values is None:
+                raw[name] = [value]
+            else:
+                values.append(value)
+        return cls(raw)
+
+    def get_bytes(self, name, default=None):
+        try:
+            values = self._raw.get(header_key(name), None)
+        except (KeyError, UnicodeEncodeError):
+            return default
+        if values is None:
+            return default
+        return values[0]
+
+    def get_all_bytes(self, name):
+        try:
+            return list(self._raw.get(header_key(name), ()))
+        except (KeyError, UnicodeEncodeError):
+            return []
+
+    def get_all(self, name):
+        values = []
+        for value in self.get_all_bytes(name):
+            try:
+                values.append(value.decode("utf-8"))
+            except Exception:  # invalid utf-8
+                values.append(None)
+        return values
+
+    def __getitem__(self, name):
+        try:
+            key = header_key(name)
+        except UnicodeEncodeError:
+            raise KeyError(name)
+        decoded = self._decoded
+        if key in decoded:
+            return decoded[key]
+        values = self._raw[key]
+        try:
+            value = values[0].decode("utf-8")
+        except Exception:  # invalid utf-8
+            value = None
+        decoded[key] = value
+        return value
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def __contains__(self, name):
+        try:
+            return header_key(name) in self._raw
+        except (KeyError, UnicodeEncodeError):
+            return False
+
+    def __iter__(self):
+        for name in self._raw:
+            yield name.decode("latin-1")
+
+    def __len__(self):
+        return len(self._raw)
+
+    def raw_items(self):
+        for name, values in self._raw.items():
+            for value in values:
+                yield (name, value)
+
+    def __repr__(self):
+        return "Headers(%r)" % list(self.raw_items())
+
+
+class QueryParams(Mapping):
+    # the raw query string is split on first access and each key is decoded
+    # only when it is asked for, mapping access returns lists like parse_qs
+    __slots__ = ("query_string", "_index", "_values")
+
+    def __init__(self, query_string=""):
+        self.query_string = query_string
+        # decoded key -> [raw value, ...]
+        self._index = None
+        # decoded key -> [decoded value, ...]
+        self._values = {}
+
+    def _get_index(self):
+        index = self._index
+        if index is None:
+            index = {}
+            if self.query_string:
+                for pair in self.query_string.split("&"):
+                    if not pair:
+                        continue
+                    (key, _, value) = pair.partition("=")
+                    if not value:
+                        # same as parse_qs, blank values are dropped
+                        continue
+                    if "%" in key or "+" in key:
+                        key = unquote_plus(key)
+                    values = index.get(key, None)
+                    if values is None:
+                        index[key] = [value]
+                    else:
+                        values.append(value)
+            self._index = index
+        return index
+
+    def __getitem__(self, key):
+        values = self._values.get(key, None)
+        if values is not None:
+            return values
+        raw = self._get_index()[key]
+        values = [
+            unquote_plus(value) if ("%" in value or "+" in value) else value
+            for value in raw
+        ]
+        self._values[key] = values
+        return values
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def get_first(self, key, default=None):
+        try:
+            return self[key][0]
+        except KeyError:
+            return default
+
+    def get_last(self, key, default=None):
+        try:
+            return self[key][-1]
+        except KeyError:
+            return default
+
+    def get_list(self, key):
+        try:
+            return list(self[key])
+        except KeyError:
+            return []
+
+    def get_int(self, key, default=None):
+        try:
+            return int(self[key][0])
+        except (KeyError, ValueError):
+            return default
+
+    def get_float(self, key, default=None):
+        try:
+            return float(self[key][0])
+        except (KeyError, ValueError):
+            return default
+
+    def __contains__(self, key):
+        return key in self._get_index()
+
+    def __iter__(self):
+        return iter(self._get_index())
+
+    def __len__(self):
+        return len(self._get_index())
+
+    def __repr__(self):
+        return "QueryParams(%r)" % self.query_string
+
+
+class FormData(Mapping):
+    # urlencoded fields in arrival order, mapping access returns the last value
+    # like the dict get_form_urlencoded used to return
+    __slots__ = ("_items", "_index")
+
+    def __init__(self, items=None):
+        # [(key, value), ...]
+        self._items = items if items is not None else []
+        self._index = None
+
+    def _get_index(self):
+        index = self._index
+        if index is None:
+            index = {}
+            for key, value in self._items:
+                values = index.get(key, None)
+                if values is None:
+                    index[key] = [value]
+                else:
+                    values.append(value)
+            self._index = index
+        return index
+
+    def __getitem__(self, key):
+        return self._get_index()[key][-1]
+
+    def get_first(self, key, default=None):
+        try:
+            return self._get_index()[key][0]
+        except KeyError:
+            return default
+
+    def get_last(self, key, default=None):
+        try:
+            return self._get_index()[key][-1]
+        except KeyError:
+            return default
+
+    def get_list(self, key):
+        return list(self._get_index().get(key, ()))
+
+    def multi_items(self):
+        return list(self._items)
+
+    def __contains__(self, key):
+        return key in self._get_index()
+
+    def __iter__(self):
+        return iter(self._get_index())
+
+    def __len__(self):
+        return len(self._get_index())
+
+    def __repr__(self):
+        return "FormData(%r)" % self._items
+
+
+def pack_headers(headers):
+    # [(name, value), ...] as bytes -> native socketify_header list. Setting the
+    # fields one by one through cffi costs more than the native calls it saves,
+    # so names and values share one buffer and the list is written with a
+    # single memmove. Both returned objects must outlive every use of the list
+    count = len(headers)
+    buffer = ffi.from_buffer(b"".join([name + value for name, value in headers]))
+    items = ffi.new("socketify_header[]", count)
+    offset = int(ffi.cast(uintptr, buffer))
+    address = int(ffi.cast(uintptr, items))
+    fields = []
+    for name, value in headers:
+        name_size = len(name)
+        value_size = len(value)
+        address += header_size
+        fields += (offset, offset + name_size, name_size, value_size, address)
+        offset += name_size + value_size
+    fields[-1] = 0  # last next
+    ffi.memmove(items, struct.pack("PPNNP" * count, *fields), header_size * count)
+    return (items, buffer)
+
+
+def encode_header(value):
+    if isinstance(value, bytes):
+        data = value
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+    else:
+        data = str(value).encode("utf-8")
+    if b"\r" in data or b"\n" in data:
+        raise RuntimeError("%r is not a valid header, line breaks are not allowed" % (value,))
+    return data
+
+
+def encode_headers(headers):
+    # [(name, value), ...] as bytes from a mapping or pairs of str/bytes/values
+    if isinstance(headers, Mapping):
+        headers = headers.items()
+    encoded = [(encode_header(name), encode_header(value)) for name, value in headers]
+    for name, _ in encoded:
+        if not name or b":" in name:
+            raise RuntimeError('"%s" is not a valid header name' % name.decode("latin-1"))
+    return encoded
+
+
+class HeaderSet:
+    # response headers encoded once into a native socketify_header list,
+    # res.write_headers(header_set) writes it with a single native call
+    __slots__ = ("headers", "native", "buffer")
+
+    def __init__(self, headers):
+        # [(name, value), ...] as bytes, buffer keeps the names and values the
+        # native list points into alive
+        self.headers = headers
+        if headers:
+            (self.native, self.buffer) = pack_headers(headers)
+        else:
+            self.native = None
+            self.buffer = None
+
+    @classmethod
+    def compile(cls, headers):
+        if isinstance(headers, HeaderSet):
+            return headers
+        return cls(encode_headers(headers))
+
+    def merge(self, headers):
+        # a new set with more headers appended, both stay usable
+        if not isinstance(headers, HeaderSet):
+            return HeaderSet(self.headers + encode_headers(headers))
+        return HeaderSet(self.headers + headers.headers)
+
+    def __iter__(self):
+        return iter(self.headers)
+
+    def __len__(self):
+        return len(self.headers)
+
+    def __repr__(self):
+        return "HeaderSet(%r)" % self.headers
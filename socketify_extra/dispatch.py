@@ -0,0 +1,227 @@
+import inspect
+
+from .request import AppRequest
+from .response import AppResponse
+
+
+# All the decisions that used to happen on every request (sync or async handler,
+# factory, extensions) are taken once here, when the route is registered, and the
+# native callback only has to call the returned dispatcher with (res, req).
+# prelude(response, request) runs the per route request setup before the handler,
+# returning False means the request was already handled and the handler is skipped
+def create_dispatcher(app, handler, prelude=None):
+    is_async = inspect.iscoroutinefunction(handler)
+
+    if app._factory:
+        if is_async:
+            return _factory_async_dispatcher(app, handler, prelude)
+        return _factory_sync_dispatcher(app, handler, prelude)
+
+    if app._response_extension and (
+        not app._response_extension.empty or not app._request_extension.empty
+    ):
+        if is_async:
+            return _extension_async_dispatcher(app, handler, prelude)
+        return _extension_sync_dispatcher(app, handler, prelude)
+
+    if is_async:
+        return _async_dispatcher(app, handler, prelude)
+    return _sync_dispatcher(app, handler, prelude)
+
+
+def _sync_dispatcher(app, handler, prelude):
+    loop = app.loop
+    trigger_error = app.trigger_error
+
+    def dispatch(res, req):
+        loop.is_idle = False
+        response = AppResponse(res, app)
+        request = AppRequest(req, app, res)
+        try:
+            if prelude is not None and not prelude(response, request):
+                return
+            handler(response, request)
+        except Exception as err:
+            response.grab_aborted_handler()
+            trigger_error(err, response, request)
+
+    return dispatch
+
+
+def _async_dispatcher(app, handler, prelude):
+    loop = app.loop
+    run_async = loop.run_async
+    trigger_error = app.trigger_error
+
+    def dispatch(res, req):
+        loop.is_idle = False
+        response = AppResponse(res, app)
+        request = AppRequest(req, app, res)
+        try:
+            if prelude is not None and not prelude(response, request):
+                return
+            response.grab_aborted_handler()
+            run_async(handler(response, request), response)
+        except Exception as err:
+            response.grab_aborted_handler()
+            trigger_error(err, response, request)
+
+    return dispatch
+
+
+def _extension_sync_dispatcher(app, handler, prelude):
+    loop = app.loop
+    trigger_error = app.trigger_error
+    response_extension = app._response_extension
+    request_extension = app._request_extension
+
+    def dispatch(res, req):
+        loop.is_idle = False
+        response = AppResponse(res, app)
+        # set default value in properties
+        response_extension.set_properties(response)
+        # bind methods to response
+        response_extension.bind_methods(response)
+        request = AppRequest(req, app, res)
+        # set default value in properties
+        request_extension.set_properties(request)
+        # bind methods to request
+        request_extension.bind_methods(request)
+        try:
+            if prelude is not None and not prelude(response, request):
+                return
+            handler(response, request)
+        except Exception as err:
+            response.grab_aborted_handler()
+            trigger_error(err, response, request)
+
+    return dispatch
+
+
+def _extension_async_dispatcher(app, handler, prelude):
+    loop = app.loop
+    run_async = loop.run_async
+    trigger_error = app.trigger_error
+    response_extension = app._response_extension
+    request_extension = app._request_extension
+
+    def dispatch(res, req):
+        loop.is_idle = False
+        response = AppResponse(res, app)
+        # set default value in properties
+        response_extension.set_properties(response)
+        # bind methods to response
+        response_extension.bind_methods(response)
+        request = AppRequest(req, app, res)
+        # set default value in properties
+        request_extension.set_properties(request)
+        # bind methods to request
+        request_extension.bind_methods(request)
+        try:
+            if prelude is not None and not prelude(response, request):
+                return
+            response.grab_aborted_handler()
+            run_async(handler(response, request), response)
+        except Exception as err:
+            response.grab_aborted_handler()
+            trigger_error(err, response, request)
+
+    return dispatch
+
+
+def release(factory, instances):
+    response = instances[0]
+    if response._detached:
+        # a prelude kept the response to answer it later (cache waiters), it
+        # goes back to the factory once answered
+        response._on_release = lambda: factory.dispose(instances)
+    else:
+        factory.dispose(instances)
+
+
+def _factory_sync_dispatcher(app, handler, prelude):
+    loop = app.loop
+    trigger_error = app.trigger_error
+    factory = app._factory
+
+    def dispatch(res, req):
+        loop.is_idle = False
+        instances = factory.get(app, res, req)
+        (response, request, dispose) = instances
+        try:
+            if prelude is not None and not prelude(response, request):
+                if dispose:
+                    release(factory, instances)
+                return
+            handler(response, request)
+            if dispose:
+                factory.dispose(instances)
+        except Exception as err:
+            response.grab_aborted_handler()
+            trigger_error(err, response, request)
+            if dispose:
+                factory.dispose(instances)
+
+    return dispatch
+
+
+def _factory_async_dispatcher(app, handler, prelude):
+    loop = app.loop
+    run_async = loop.run_async
+    trigger_error = app.trigger_error
+    factory = app._factory
+
+    async def wrapper(instances, response, request):
+        try:
+            await handler(response, request)
+        finally:
+            factory.dispose(instances)
+
+    def dispatch(res, req):
+        loop.is_idle = False
+        instances = factory.get(app, res, req)
+        (response, request, dispose) = instances
+        try:
+            if prelude is not None and not prelude(response, request):
+                if dispose:
+                    release(factory, instances)
+                return
+            response.grab_aborted_handler()
+            if dispose:
+                run_async(wrapper(instances, response, request), response)
+            else:
+                run_async(handler(response, request), response)
+        except Exception as err:
+            response.grab_aborted_handler()
+            trigger_error(err, response, request)
+            if dispose:
+                factory.dispose(instances)
+
+    return dispatch
+
+
+def create_resume(app, handler):
+    # runs handler for a response answered after its native callback returned,
+    # the request must have been preserved before
+    run_async = app.loop.run_async
+    trigger_error = app.trigger_error
+    is_async = inspect.iscoroutinefunction(handler)
+
+    async def wrapper(response, request):
+        try:
+            await handler(response, request)
+        finally:
+            response._release()
+
+    def resume(response, request):
+        try:
+            if is_async:
+                run_async(wrapper(response, request), response)
+            else:
+                handler(response, request)
+                response._release()
+        except Exception as err:
+            trigger_error(err, response, request)
+            response._release()
+
+    return resume
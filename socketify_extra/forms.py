@@ -0,0 +1,65 @@
+from urllib.parse import unquote_plus
+
+from .datastructures import FormData
+
+
+def parse_urlencoded_pairs(data, encoding="utf-8", max_fields=None):
+    # one decode of the whole buffer, then only keys and values that contain
+    # an escape are unquoted, exactly once
+    text = data if isinstance(data, str) else str(data, encoding)
+    items = []
+    for pair in text.split("&"):
+        if not pair:
+            continue
+        (key, _, value) = pair.partition("=")
+        if "%" in key or "+" in key:
+            key = unquote_plus(key, encoding)
+        if "%" in value or "+" in value:
+            value = unquote_plus(value, encoding)
+        items.append((key, value))
+    if max_fields is not None and len(items) > max_fields:
+        raise RuntimeError("Too many form fields")
+    return items
+
+
+def parse_urlencoded(data, encoding="utf-8", max_fields=None):
+    return FormData(parse_urlencoded_pairs(data, encoding, max_fields))
+
+
+class FormParser:
+    # incremental variant, feed() returns the fields completed by each chunk
+    # so a large form never has to be held as a single body
+    def __init__(self, encoding="utf-8", max_fields=None, max_field_size=1024 * 1024):
+        self.encoding = encoding
+        self.max_fields = max_fields
+        self.max_field_size = max_field_size
+        self.fields = 0
+        self.buffer = bytearray()
+
+    def _parse(self, data):
+        items = parse_urlencoded_pairs(data, self.encoding)
+        self.fields += len(items)
+        if self.max_fields is not None and self.fields > self.max_fields:
+            raise RuntimeError("Too many form fields")
+        return items
+
+    def feed(self, data):
+        buffer = self.buffer
+        buffer += data
+        # '&' never appears inside a multi byte character of an ascii
+        # compatible encoding, splitting bytes here is safe
+        end = buffer.rfind(b"&")
+        if end == -1:
+            if len(buffer) > self.max_field_size:
+                raise RuntimeError("Form field is larger than max_field_size")
+            return []
+        items = self._parse(memoryview(buffer)[:end])
+        del buffer[: end + 1]
+        return items
+
+    def close(self):
+        buffer = self.buffer
+        self.buffer = bytearray()
+        if not buffer:
+            return []
+        return self._parse(buffer)
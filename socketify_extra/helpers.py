@@ -126,23 +126,51 @@ def static_route(app, route, directory):
     app.get("%s/*" % route, route_handler)
 
 
-def middleware(*functions):
-    syncs = []
-    asyncs = []
+def compile_pipeline(functions):
+    # classify every stage once, consecutive stages of the same kind are fused
+    # into one segment so each request only loops over plain tuples
+    segments = []
     for function in functions:
-        # all is async after the first async
-        if inspect.iscoroutinefunction(function) or len(asyncs) > 0:
-            asyncs.append(function)
+        is_async = inspect.iscoroutinefunction(function)
+        if segments and segments[-1][0] == is_async:
+            segments[-1][1].append(function)
+        else:
+            segments.append((is_async, [function]))
+    return tuple((is_async, tuple(stages)) for (is_async, stages) in segments)
+
+
+async def run_pipeline(segments, res, req, data):
+    # the caller already preserved the request before going async
+    for is_async, stages in segments:
+        if is_async:
+            for function in stages:
+                data = await function(res, req, data)
+                # stops if returns Falsy
+                if not data:
+                    return data
         else:
-            syncs.append(function)
-    if len(asyncs) == 0:  # pure sync
+            for function in stages:
+                data = function(res, req, data)
+                # stops if returns Falsy
+                if not data:
+                    return data
+    return data
+
+
+def middleware(*functions):
+    segments = compile_pipeline(functions)
+    if len(segments) == 0 or (len(segments) == 1 and not segments[0][0]):
+        # pure sync
         return sync_middleware(*functions)
-    if len(syncs) == 0:  # pure async
+    if segments[0][0]:  # starts async
         return async_middleware(*functions)
 
+    syncs = segments[0][1]
+    asyncs = segments[1:]
+
     # we use Optional data=None at the end so you can use and middleware inside a middleware
     def optimized_middleware_route(res, req, data=None):
-        # cicle to all middlewares
+        # cicle to all sync middlewares before the first async one
         for function in syncs:
             # call middlewares
             data = function(res, req, data)
@@ -150,26 +178,12 @@ def middleware(*functions):
             if not data:
                 return
 
-        async def wrapper(res, req, data):
-            # cicle to all middlewares
-            for function in asyncs:
-                # detect if is coroutine or not
-                if inspect.iscoroutinefunction(function):
-                    data = await function(res, req, data)
-                else:
-                    # call sync middleware
-                    data = function(res, req, data)
-                # stops if returns Falsy
-                if not data:
-                    break
-            return data
-
         # in async query string, arguments and headers are only valid until the first await
         # preserve queries, headers, parameters, url, full_url and method
         req.preserve()
 
         # go async
-        res.run_async(wrapper(res, req, data))
+        res.run_async(run_pipeline(asyncs, res, req, data))
 
     return optimized_middleware_route
 
@@ -190,164 +204,139 @@ def sync_middleware(*functions):
 
 
 def async_middleware(*functions):
+    segments = compile_pipeline(functions)
+
     # we use Optional data=None at the end so you can use and middleware inside a middleware
     async def middleware_route(res, req, data=None):
-        some_async_as_run = False
-        # cicle to all middlewares
-        for function in functions:
-            # detect if is coroutine or not
-            if inspect.iscoroutinefunction(function):
+        preserved = False
+        for is_async, stages in segments:
+            if is_async:
                 # in async query string, arguments and headers are only valid until the first await
-                if not some_async_as_run:
+                if not preserved:
                     # preserve queries, headers, parameters, url, full_url and method
                     req.preserve()
-                    some_async_as_run = True
-                data = await function(res, req, data)
+                    preserved = True
+                for function in stages:
+                    data = await function(res, req, data)
+                    # stops if returns Falsy
+                    if not data:
+                        return data
             else:
-                # call middlewares
-                data = function(res, req, data)
-            # stops if returns Falsy
-            if not data:
-                break
+                for function in stages:
+                    # call middlewares
+                    data = function(res, req, data)
+                    # stops if returns Falsy
+                    if not data:
+                        return data
         return data
 
     return middleware_route
 
 
 class DecoratorRouter:
-    def __init__(self, app, prefix: str = "", *middlewares):
+    def __init__(self, app=None, prefix: str = "", *middlewares):
         self.app = app
-        self.middlewares = list(*middlewares)
+        if len(middlewares) == 1 and isinstance(middlewares[0], (list, tuple)):
+            # App.router passes the middlewares as a single tuple
+            middlewares = middlewares[0]
+        self.middlewares = list(middlewares)
         self.prefix = prefix
+        # every route added so far, already prefixed and with merged middlewares
+        self.routes = []
+        # (parent, prefix) for every router or app this router is mounted on
+        self._mounts = []
 
-    def get(self, path):
+    def add_route(self, path, handler, methods=("GET",), middlewares=(), **options):
         path = f"{self.prefix}{path}"
+        middlewares = (*self.middlewares, *middlewares)
+        self.routes.append((path, handler, methods, middlewares, options))
+        if self.app is not None:
+            self.app.add_route(path, handler, methods, middlewares, **options)
+        for parent, prefix in self._mounts:
+            parent.add_route(f"{prefix}{path}", handler, methods, middlewares, **options)
+        return self
 
+    def mount(self, router, prefix: str = ""):
+        # routes are flattened into this router with composed prefixes and
+        # merged middlewares, so nesting adds nothing at request time
+        if router.app is not None:
+            # its routes already reach the app, mounting would add them twice
+            raise RuntimeError("a router created with an app can not be mounted")
+        router._mounts.append((self, prefix))
+        for route_path, handler, methods, middlewares, options in router.routes:
+            self.add_route(f"{prefix}{route_path}", handler, methods, middlewares, **options)
+        return router
+
+    def router(self, prefix: str = "", *middlewares):
+        return self.mount(DecoratorRouter(None, prefix, middlewares))
+
+    def get(self, path, **options):
         def decorator(handler):
-            if len(self.middlewares) > 0:
-                middies = list(self.middlewares)
-                middies.append(handler)
-                self.app.get(path, middleware(*middies))
-            else:
-                self.app.get(path, handler)
+            self.add_route(path, handler, ("GET",), **options)
             return handler
 
         return decorator
 
-    def post(self, path):
-        path = f"{self.prefix}{path}"
-
+    def post(self, path, **options):
         def decorator(handler):
-            if len(self.middlewares) > 0:
-                middies = list(self.middlewares)
-                middies.append(handler)
-                self.app.post(path, middleware(*middies))
-            else:
-                self.app.post(path, handler)
+            self.add_route(path, handler, ("POST",), **options)
+            return handler
 
         return decorator
 
-    def options(self, path):
-        path = f"{self.prefix}{path}"
-
+    def options(self, path, **options):
         def decorator(handler):
-            if len(self.middlewares) > 0:
-                middies = list(self.middlewares)
-                middies.append(handler)
-                self.app.options(path, middleware(*middies))
-            else:
-                self.app.options(path, handler)
+            self.add_route(path, handler, ("OPTIONS",), **options)
+            return handler
 
         return decorator
 
-    def delete(self, path):
-        path = f"{self.prefix}{path}"
-
+    def delete(self, path, **options):
         def decorator(handler):
-            if len(self.middlewares) > 0:
-                middies = list(self.middlewares)
-                middies.append(handler)
-                self.app.delete(path, middleware(*middies))
-            else:
-                self.app.delete(path, handler)
+            self.add_route(path, handler, ("DELETE",), **options)
+            return handler
 
         return decorator
 
-    def patch(self, path):
-        path = f"{self.prefix}{path}"
-
+    def patch(self, path, **options):
         def decorator(handler):
-            if len(self.middlewares) > 0:
-                middies = list(self.middlewares)
-                middies.append(handler)
-                self.app.patch(path, middleware(*middies))
-            else:
-                self.app.patch(path, handler)
+            self.add_route(path, handler, ("PATCH",), **options)
+            return handler
 
         return decorator
 
-    def put(self, path: str):
-        path = f"{self.prefix}{path}"
-
+    def put(self, path: str, **options):
         def decorator(handler):
-            if len(self.middlewares) > 0:
-                middies = list(self.middlewares)
-                middies.append(handler)
-                self.app.put(path, middleware(*middies))
-            else:
-                self.app.put(path, handler)
+            self.add_route(path, handler, ("PUT",), **options)
+            return handler
 
         return decorator
 
-    def head(self, path):
-        path = f"{self.prefix}{path}"
-
+    def head(self, path, **options):
         def decorator(handler):
-            if len(self.middlewares) > 0:
-                middies = list(self.middlewares)
-                middies.append(handler)
-                self.app.head(path, middleware(*middies))
-            else:
-                self.app.head(path, handler)
+            self.add_route(path, handler, ("HEAD",), **options)
+            return handler
 
         return decorator
 
-    def connect(self, path):
-        path = f"{self.prefix}{path}"
-
+    def connect(self, path, **options):
         def decorator(handler):
-            if len(self.middlewares) > 0:
-                middies = list(self.middlewares)
-                middies.append(handler)
-                self.app.connect(path, middleware(*middies))
-            else:
-                self.app.connect(path, handler)
+            self.add_route(path, handler, ("CONNECT",), **options)
+            return handler
 
         return decorator
 
-    def trace(self, path):
-        path = f"{self.prefix}{path}"
-
+    def trace(self, path, **options):
         def decorator(handler):
-            if len(self.middlewares) > 0:
-                middies = list(self.middlewares)
-                middies.append(handler)
-                self.app.trace(path, middleware(*middies))
-            else:
-                self.app.trace(path, handler)
+            self.add_route(path, handler, ("TRACE",), **options)
+            return handler
 
         return decorator
 
-    def any(self, path):
-        path = f"{self.prefix}{path}"
-
+    def any(self, path, **options):
         def decorator(handler):
-            if len(self.middlewares) > 0:
-                middies = list(self.middlewares)
-                middies.append(handler)
-                self.app.any(path, middleware(*middies))
-            else:
-                self.app.any(path, handler)
+            self.add_route(path, handler, ("*",), **options)
+            return handler
 
         return decorator
 
@@ -357,62 +346,109 @@ class MiddlewareRouter:
         self.app = app
         self.middlewares = middlewares
 
-    def get(self, path, handler):
-        middies = list(self.middlewares)
-        middies.append(handler)
-        self.app.get(path, middleware(*middies))
+    def get(self, path, handler, **options):
+        self.app.add_route(path, handler, ("GET",), self.middlewares, **options)
         return self
 
-    def post(self, path, handler):
-        middies = list(self.middlewares)
-        middies.append(handler)
-        self.app.post(path, middleware(*middies))
+    def post(self, path, handler, **options):
+        self.app.add_route(path, handler, ("POST",), self.middlewares, **options)
         return self
 
-    def options(self, path, handler):
-        middies = list(self.middlewares)
-        middies.append(handler)
-        self.app.options(path, middleware(*middies))
+    def options(self, path, handler, **options):
+        self.app.add_route(path, handler, ("OPTIONS",), self.middlewares, **options)
         return self
 
-    def delete(self, path, handler):
-        middies = list(self.middlewares)
-        middies.append(handler)
-        self.app.delete(path, middleware(*middies))
+    def delete(self, path, handler, **options):
+        self.app.add_route(path, handler, ("DELETE",), self.middlewares, **options)
         return self
 
-    def patch(self, path, handler):
-        middies = list(self.middlewares)
-        middies.append(handler)
-        self.app.patch(path, middleware(*middies))
+    def patch(self, path, handler, **options):
+        self.app.add_route(path, handler, ("PATCH",), self.middlewares, **options)
         return self
 
-    def put(self, path, handler):
-        middies = list(self.middlewares)
-        middies.append(handler)
-        self.app.put(path, middleware(*middies))
+    def put(self, path, handler, **options):
+        self.app.add_route(path, handler, ("PUT",), self.middlewares, **options)
         return self
 
-    def head(self, path, handler):
-        middies = list(self.middlewares)
-        middies.append(handler)
-        self.app.head(path, middleware(*middies))
+    def head(self, path, handler, **options):
+        self.app.add_route(path, handler, ("HEAD",), self.middlewares, **options)
         return self
 
-    def connect(self, path, handler):
-        middies = list(self.middlewares)
-        middies.append(handler)
-        self.app.connect(path, middleware(*middies))
+    def connect(self, path, handler, **options):
+        self.app.add_route(path, handler, ("CONNECT",), self.middlewares, **options)
         return self
 
-    def trace(self, path, handler):
-        middies = list(self.middlewares)
-        middies.append(handler)
-        self.app.trace(path, middleware(*middies))
+    def trace(self, path, handler, **options):
+        self.app.add_route(path, handler, ("TRACE",), self.middlewares, **options)
+        return self
+
+    def any(self, path, handler, **options):
+        self.app.add_route(path, handler, ("*",), self.middlewares, **options)
+        return self
+
+
+class HostRouter:
+    def __init__(self, app, host, *middlewares):
+        self.app = app
+        self.host = host
+        self.middlewares = middlewares
+
+    def get(self, path, handler, **options):
+        self.app.add_route(
+            path, handler, ("GET",), self.middlewares, host=self.host, **options
+        )
         return self
 
-    def any(self, path, handler):
-        middies = list(self.middlewares)
-        middies.append(handler)
-        self.app.any(path, middleware(*middies))
+    def post(self, path, handler, **options):
+        self.app.add_route(
+            path, handler, ("POST",), self.middlewares, host=self.host, **options
+        )
+        return self
+
+    def options(self, path, handler, **options):
+        self.app.add_route(
+            path, handler, ("OPTIONS",), self.middlewares, host=self.host, **options
+        )
+        return self
+
+    def delete(self, path, handler, **options):
+        self.app.add_route(
+            path, handler, ("DELETE",), self.middlewares, host=self.host, **options
+        )
+        return self
+
+    def patch(self, path, handler, **options):
+        self.app.add_route(
+            path, handler, ("PATCH",), self.middlewares, host=self.host, **options
+        )
+        return self
+
+    def put(self, path, handler, **options):
+        self.app.add_route(
+            path, handler, ("PUT",), self.middlewares, host=self.host, **options
+        )
+        return self
+
+    def head(self, path, handler, **options):
+        self.app.add_route(
+            path, handler, ("HEAD",), self.middlewares, host=self.host, **options
+        )
+        return self
+
+    def connect(self, path, handler, **options):
+        self.app.add_route(
+            path, handler, ("CONNECT",), self.middlewares, host=self.host, **options
+        )
+        return self
+
+    def trace(self, path, handler, **options):
+        self.app.add_route(
+            path, handler, ("TRACE",), self.middlewares, host=self.host, **options
+        )
+        return self
+
+    def any(self, path, handler, **options):
+        self.app.add_route(
+            path, handler, ("*",), self.middlewares, host=self.host, **options
+        )
         return self
@@ -0,0 +1,303 @@
+import re
+import asyncio
+import tempfile
+from collections import deque
+from urllib.parse import unquote
+
+from .datastructures import Headers
+
+
+option_pattern = re.compile(r';\s*([^\s=;]+)\s*=\s*("(?:[^"\\]|\\.)*"|[^;]*)')
+
+
+def parse_options_header(value):
+    # "form-data; name=\"a\"; filename=\"b.txt\"" -> ("form-data", {...})
+    if not value:
+        return ("", {})
+    (main, _, rest) = value.partition(";")
+    options = {}
+    for match in option_pattern.finditer(";" + rest):
+        key = match.group(1).lower()
+        option = match.group(2).strip()
+        if option[:1] == '"':
+            option = option[1:-1].replace('\\"', '"')
+        if key.endswith("*"):
+            # RFC 5987 extended value, charset'language'percent-encoded
+            (charset, _, encoded) = option.partition("'")
+            encoded = encoded.partition("'")[2]
+            try:
+                option = unquote(encoded, encoding=charset or "utf-8")
+            except LookupError:
+                option = unquote(encoded)
+            key = key[:-1]
+        elif key in options:
+            # filename* wins over filename whatever the order
+            continue
+        options[key] = option
+    return (main.strip().lower(), options)
+
+
+def get_boundary(content_type):
+    (main, options) = parse_options_header(content_type)
+    if main != "multipart/form-data":
+        raise RuntimeError('"%s" is not multipart/form-data' % content_type)
+    boundary = options.get("boundary", None)
+    if not boundary or len(boundary) > 200:
+        raise RuntimeError("multipart/form-data is missing a valid boundary")
+    return boundary.encode("latin-1")
+
+
+PREAMBLE = 0
+HEADERS = 1
+BODY = 2
+DELIMITER = 3
+END = 4
+
+
+class MultipartParser:
+    # incremental multipart/form-data parser, feed() takes chunks of any size
+    # and returns (event, value) tuples:
+    #   ("begin", Headers), ("data", bytes), ("end", None)
+    def __init__(self, boundary, max_header_size=16 * 1024):
+        if isinstance(boundary, str):
+            boundary = boundary.encode("latin-1")
+        self.first_delimiter = b"--" + boundary
+        self.delimiter = b"\r\n--" + boundary
+        self.max_header_size = max_header_size
+        self.state = PREAMBLE
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        buffer = self.buffer
+        buffer += data
+        events = []
+        while True:
+            state = self.state
+            if state == BODY:
+                index = buffer.find(self.delimiter)
+                if index == -1:
+                    # keep what could be the start of a delimiter for the next chunk
+                    safe = len(buffer) - len(self.delimiter) + 1
+                    if safe > 0:
+                        events.append(("data", bytes(buffer[:safe])))
+                        del buffer[:safe]
+                    return events
+                if index:
+                    events.append(("data", bytes(buffer[:index])))
+                del buffer[: index + len(self.delimiter)]
+                events.append(("end", None))
+                self.state = DELIMITER
+            elif state == DELIMITER:
+                if len(buffer) < 2:
+                    return events
+                if buffer[:2] == b"--":
+                    self.state = END
+                    continue
+                # transport padding is allowed before the line break
+                index = buffer.find(b"\r\n")
+                if index == -1:
+                    if len(buffer) > self.max_header_size:
+                        raise RuntimeError("Invalid multipart delimiter")
+                    return events
+                if buffer[:index].strip(b" \t"):
+                    raise RuntimeError("Invalid multipart delimiter")
+                del buffer[: index + 2]
+                self.state = HEADERS
+            elif state == HEADERS:
+                index = buffer.find(b"\r\n\r\n")
+                if index == -1:
+                    if buffer[:2] == b"\r\n":
+                        # part without any header
+                        del buffer[:2]
+                        events.append(("begin", Headers()))
+                        self.state = BODY
+                        continue
+                    if len(buffer) > self.max_header_size:
+                        raise RuntimeError("Multipart headers are too large")
+                    return events
+                if index > self.max_header_size:
+                    raise RuntimeError("Multipart headers are too large")
+                headers = []
+                for line in bytes(buffer[:index]).split(b"\r\n"):
+                    (name, separator, value) = line.partition(b":")
+                    if not separator:
+                        raise RuntimeError("Invalid multipart header")
+                    headers.append((name.strip().lower(), value.strip()))
+                del buffer[: index + 4]
+                events.append(("begin", Headers.from_list(headers)))
+                self.state = BODY
+            elif state == PREAMBLE:
+                index = buffer.find(self.first_delimiter)
+                if index == -1:
+                    safe = len(buffer) - len(self.first_delimiter) + 1
+                    if safe > 0:
+                        del buffer[:safe]
+                    return events
+                del buffer[: index + len(self.first_delimiter)]
+                self.state = DELIMITER
+            else:
+                # epilogue, ignored
+                buffer.clear()
+                return events
+
+    def close(self):
+        if self.state != END:
+            raise RuntimeError("Multipart body ended before the closing boundary")
+
+
+class FormField:
+    __slots__ = ("name", "value", "headers")
+
+    def __init__(self, name, value, headers):
+        self.name = name
+        self.value = value
+        self.headers = headers
+
+    def __repr__(self):
+        return "FormField(%r, %r)" % (self.name, self.value)
+
+
+class UploadFile:
+    # kept in memory up to spool_size, then written to a temporary file from
+    # the loop executor so disk writes never block the event loop
+    def __init__(self, name, filename, content_type, headers, spool_size):
+        self.name = name
+        self.filename = filename
+        self.content_type = content_type
+        self.headers = headers
+        self.size = 0
+        self.spool_size = spool_size
+        self.file = None
+        self._memory = bytearray()
+        self._position = 0
+
+    @property
+    def in_memory(self):
+        return self.file is None
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def write(self, data):
+        self.size += len(data)
+        if self.file is None:
+            if self.size <= self.spool_size:
+                self._memory += data
+                return
+            memory = self._memory
+            self._memory = None
+            self.file = await self._run(tempfile.TemporaryFile)
+            await self._run(self.file.write, memory + data)
+            return
+        await self._run(self.file.write, data)
+
+    async def seek(self, offset):
+        if self.file is None:
+            self._position = offset
+            return offset
+        return await self._run(self.file.seek, offset)
+
+    async def read(self, size=-1):
+        if self.file is None:
+            start = self._position
+            end = len(self._memory) if size < 0 else min(start + size, len(self._memory))
+            self._position = end
+            return bytes(self._memory[start:end])
+        return await self._run(self.file.read, size)
+
+    async def close(self):
+        if self.file is not None:
+            await self._run(self.file.close)
+        self._memory = None
+
+    def __repr__(self):
+        return "UploadFile(%r, %r, %d bytes)" % (self.name, self.filename, self.size)
+
+
+class MultipartReader:
+    # async for part in MultipartReader(res.body_stream(), content_type)
+    # yields a FormField or an UploadFile once the part is fully received
+    def __init__(
+        self,
+        stream,
+        content_type,
+        spool_size=1024 * 1024,
+        max_field_size=1024 * 1024,
+        max_fields=1000,
+        max_header_size=16 * 1024,
+    ):
+        self.stream = stream
+        self.parser = MultipartParser(get_boundary(content_type), max_header_size)
+        self.spool_size = spool_size
+        self.max_field_size = max_field_size
+        self.max_fields = max_fields
+        self.parts = 0
+        self._iterator = None
+        self._pending = deque()
+        self._part = None
+        self._ended = False
+
+    def _begin(self, headers):
+        self.parts += 1
+        if self.parts > self.max_fields:
+            raise RuntimeError("Too many multipart fields")
+        (disposition, options) = parse_options_header(
+            headers.get("content-disposition", None)
+        )
+        if disposition != "form-data" or "name" not in options:
+            raise RuntimeError("Multipart part is missing a form-data name")
+        filename = options.get("filename", None)
+        if filename is None:
+            return [options["name"], headers, bytearray()]
+        return UploadFile(
+            options["name"],
+            filename,
+            headers.get("content-type", "application/octet-stream"),
+            headers,
+            self.spool_size,
+        )
+
+    async def _handle(self, event, value):
+        part = self._part
+        if event == "data":
+            if isinstance(part, UploadFile):
+                await part.write(value)
+                return None
+            data = part[2]
+            if len(data) + len(value) > self.max_field_size:
+                raise RuntimeError('"%s" is larger than max_field_size' % part[0])
+            data += value
+            return None
+        if event == "begin":
+            self._part = self._begin(value)
+            return None
+        self._part = None
+        if isinstance(part, UploadFile):
+            await part.seek(0)
+            return part
+        (name, headers, data) = part
+        (_, options) = parse_options_header(headers.get("content-type", None))
+        return FormField(name, data.decode(options.get("charset", "utf-8")), headers)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        pending = self._pending
+        while True:
+            while pending:
+                (event, value) = pending.popleft()
+                part = await self._handle(event, value)
+                if part is not None:
+                    return part
+            if self._ended:
+                raise StopAsyncIteration
+            if self._iterator is None:
+                self._iterator = self.stream.__aiter__()
+            try:
+                chunk = await self._iterator.__anext__()
+            except StopAsyncIteration:
+                self._ended = True
+                self.parser.close()
+                continue
+            pending.extend(self.parser.feed(chunk))
@@ -2,8 +2,24 @@
 #include "libsocketify.h"
 #include <stdlib.h>
 #include <stdio.h>
+#include <string.h>
+#include <string>
+#include <unordered_map>
 #include "libuwebsockets.cpp"
 
+struct socketify_host_route
+{
+    uws_method_handler handler;
+    void *user_data;
+};
+
+struct socketify_host_router
+{
+    std::unordered_map<std::string, socketify_host_route> hosts;
+    // the route without a host on the same method and path
+    socketify_host_route fallback = {NULL, NULL};
+};
+
 extern "C"
 {
 
@@ -90,6 +106,66 @@ extern "C"
         return false;
     }
 
+    void socketify_res_end_without_body_with_length(int ssl, uws_res_t *res, size_t length, bool close_connection)
+    {
+        if (ssl)
+        {
+            uWS::HttpResponse<true> *uwsRes = (uWS::HttpResponse<true> *)res;
+            uwsRes->endWithoutBody(length, close_connection);
+        }
+        else
+        {
+            uWS::HttpResponse<false> *uwsRes = (uWS::HttpResponse<false> *)res;
+            uwsRes->endWithoutBody(length, close_connection);
+        }
+    }
+
+    void socketify_res_on_data_with_limit(int ssl, uws_res_t *res, socketify_res_on_data_handler handler, socketify_res_limit_handler on_limit, size_t limit, void *user_data)
+    {
+        if (ssl)
+        {
+            uWS::HttpResponse<true> *uwsRes = (uWS::HttpResponse<true> *)res;
+            uwsRes->onData([=, total = (size_t)0, exceeded = false](std::string_view chunk, bool is_end) mutable
+                           {
+                if (exceeded)
+                {
+                    return;
+                }
+                total += chunk.length();
+                if (total > limit)
+                {
+                    // answer and drop the connection here, the rest of the body never reaches Python
+                    exceeded = true;
+                    uwsRes->writeStatus("413 Payload Too Large");
+                    uwsRes->end({}, true);
+                    on_limit(res, user_data);
+                    return;
+                }
+                handler(res, chunk.data(), chunk.length(), is_end, user_data); });
+        }
+        else
+        {
+            uWS::HttpResponse<false> *uwsRes = (uWS::HttpResponse<false> *)res;
+            uwsRes->onData([=, total = (size_t)0, exceeded = false](std::string_view chunk, bool is_end) mutable
+                           {
+                if (exceeded)
+                {
+                    return;
+                }
+                total += chunk.length();
+                if (total > limit)
+                {
+                    // answer and drop the connection here, the rest of the body never reaches Python
+                    exceeded = true;
+                    uwsRes->writeStatus("413 Payload Too Large");
+                    uwsRes->end({}, true);
+                    on_limit(res, user_data);
+                    return;
+                }
+                handler(res, chunk.data(), chunk.length(), is_end, user_data); });
+        }
+    }
+
     void socketify_res_send_int_code(int ssl, uws_res_t *res, const char *content_data, size_t content_data_size, int code, const char *content_type, size_t content_type_size, bool close_connection)
     {
         socketify_res_write_int_status(ssl, res, code);
@@ -241,6 +317,7 @@ extern "C"
         }
         return false;
     }
+
     void socketify_destroy_headers(socketify_header *headers)
     {
 
@@ -271,7 +348,12 @@ extern "C"
         size_t query_string_size = full_url_size - url_size;
 
         const char *remote_address = NULL;
-        size_t remote_address_size = uws_res_get_remote_address_as_text(ssl, res, &remote_address);
+        size_t remote_address_size = 0;
+        if (res != NULL)
+        {
+            // requests can be snapshotted without the response
+            remote_address_size = uws_res_get_remote_address_as_text(ssl, res, &remote_address);
+        }
 
         result.full_url = full_url;
         result.url = url;
@@ -318,6 +400,17 @@ extern "C"
         return result;
     }
 
+    void socketify_req_get_parameters(uws_req_t *req, const char **values, size_t *values_sizes, size_t count)
+    {
+        uWS::HttpRequest *uwsReq = (uWS::HttpRequest *)req;
+        for (size_t i = 0; i < count; i++)
+        {
+            std::string_view value = uwsReq->getParameter((unsigned short)i);
+            values[i] = value.data();
+            values_sizes[i] = value.length();
+        }
+    }
+
     socketify_asgi_ws_data socketify_asgi_ws_request(int ssl, uws_req_t *req, uws_res_t *res)
     {
 
@@ -543,6 +636,147 @@ extern "C"
     {
         free(app);
     }
+
+    static const char *socketify_copy_bytes(const char *data, size_t size)
+    {
+        char *copy = (char *)malloc(size ? size : 1);
+        if (size)
+        {
+            memcpy(copy, data, size);
+        }
+        return copy;
+    }
+
+    socketify_static_response *socketify_create_static_response(int ssl, const char *status, size_t status_size, socketify_header *headers, const char *body, size_t body_size, bool has_body, bool head)
+    {
+        // everything is copied so the response outlives the Python buffers
+        socketify_static_response *response = (socketify_static_response *)malloc(sizeof(socketify_static_response));
+        response->ssl = ssl;
+        response->status = socketify_copy_bytes(status, status_size);
+        response->status_size = status_size;
+        response->body = socketify_copy_bytes(body, body_size);
+        response->body_size = body_size;
+        response->has_body = has_body;
+        response->head = head;
+        response->header_list = NULL;
+
+        socketify_header *last = NULL;
+        for (socketify_header *current = headers; current != NULL; current = (socketify_header *)current->next)
+        {
+            socketify_header *header = (socketify_header *)malloc(sizeof(socketify_header));
+            header->name = socketify_copy_bytes(current->name, current->name_size);
+            header->name_size = current->name_size;
+            header->value = socketify_copy_bytes(current->value, current->value_size);
+            header->value_size = current->value_size;
+            header->next = NULL;
+            if (last)
+            {
+                last->next = header;
+            }
+            else
+            {
+                response->header_list = header;
+            }
+            last = header;
+        }
+        return response;
+    }
+
+    void socketify_static_response_handler(uws_res_t *res, uws_req_t *req, void *user_data)
+    {
+        socketify_static_response *response = (socketify_static_response *)user_data;
+        int ssl = response->ssl;
+        uws_res_write_status(ssl, res, response->status, response->status_size);
+        for (socketify_header *header = response->header_list; header != NULL; header = (socketify_header *)header->next)
+        {
+            uws_res_write_header(ssl, res, header->name, header->name_size, header->value, header->value_size);
+        }
+        if (response->head && response->has_body)
+        {
+            // HEAD answered from a GET response, same Content-Length but no body
+            socketify_res_end_without_body_with_length(ssl, res, response->body_size, false);
+        }
+        else if (response->has_body)
+        {
+            uws_res_end(ssl, res, response->body, response->body_size, false);
+        }
+        else
+        {
+            uws_res_end_without_body(ssl, res, false);
+        }
+    }
+
+    socketify_host_router *socketify_create_host_router()
+    {
+        return new socketify_host_router();
+    }
+
+    void socketify_host_router_add(socketify_host_router *router, const char *host, size_t host_size, uws_method_handler handler, void *user_data)
+    {
+        // hosts are registered lower case and without port
+        router->hosts[std::string(host, host_size)] = {handler, user_data};
+    }
+
+    void socketify_host_router_handler(uws_res_t *res, uws_req_t *req, void *user_data)
+    {
+        socketify_host_router *router = (socketify_host_router *)user_data;
+        uWS::HttpRequest *uwsReq = (uWS::HttpRequest *)req;
+        std::string_view header = uwsReq->getHeader("host");
+
+        // strip the port, keeping IPv6 literals like [::1] intact
+        size_t end = header.size();
+        size_t colon = header.rfind(':');
+        if (colon != std::string_view::npos && header.find(']', colon) == std::string_view::npos)
+        {
+            end = colon;
+        }
+
+        std::string host(header.data(), end);
+        for (size_t i = 0; i < host.size(); i++)
+        {
+            host[i] = (char)tolower((unsigned char)host[i]);
+        }
+
+        auto it = router->hosts.find(host);
+        if (it == router->hosts.end())
+        {
+            if (router->fallback.handler != NULL)
+            {
+                router->fallback.handler(res, req, router->fallback.user_data);
+                return;
+            }
+            // no route for this host, let uWS try the next handler
+            uwsReq->setYield(true);
+            return;
+        }
+        it->second.handler(res, req, it->second.user_data);
+    }
+
+    void socketify_host_router_set_default(socketify_host_router *router, uws_method_handler handler, void *user_data)
+    {
+        router->fallback = {handler, user_data};
+    }
+
+    void socketify_destroy_host_router(socketify_host_router *router)
+    {
+        delete router;
+    }
+
+    void socketify_destroy_static_response(socketify_static_response *response)
+    {
+        socketify_header *header = response->header_list;
+        while (header != NULL)
+        {
+            socketify_header *next = (socketify_header *)header->next;
+            free((void *)header->name);
+            free((void *)header->value);
+            free(header);
+            header = next;
+        }
+        free((void *)response->status);
+        free((void *)response->body);
+        free(response);
+    }
     void socketify_destroy_asgi_ws_app_info(socketify_asgi_ws_app_info *app)
     {
         free(app);
@@ -11,6 +11,8 @@ extern "C"
 #endif
   DLL_EXPORT typedef void (*socketify_prepare_handler)(void *user_data);
   DLL_EXPORT typedef void (*socketify_timer_handler)(void *user_data);
+  DLL_EXPORT typedef void (*socketify_res_on_data_handler)(uws_res_t *res, const char *chunk, size_t chunk_length, bool is_end, void *user_data);
+  DLL_EXPORT typedef void (*socketify_res_limit_handler)(uws_res_t *res, void *user_data);
 
   DLL_EXPORT typedef enum {
     SOCKETIFY_RUN_DEFAULT = 0,
@@ -109,6 +111,20 @@ extern "C"
     void *user_data;
   } socketify_asgi_ws_app_info;
 
+  DLL_EXPORT typedef struct
+  {
+    int ssl;
+    const char *status;
+    size_t status_size;
+    socketify_header *header_list;
+    const char *body;
+    size_t body_size;
+    bool has_body;
+    bool head;
+  } socketify_static_response;
+
+  DLL_EXPORT typedef struct socketify_host_router socketify_host_router;
+
   DLL_EXPORT socketify_loop *socketify_create_loop();
   DLL_EXPORT bool socketify_constructor_failed(socketify_loop *loop);
   DLL_EXPORT bool socketify_on_prepare(socketify_loop *loop, socketify_prepare_handler handler, void *user_data);
@@ -131,11 +147,24 @@ extern "C"
   DLL_EXPORT bool socketify_res_write_int_status_with_headers(int ssl, uws_res_t *res, int code, socketify_header *headers);
   DLL_EXPORT void socketify_res_write_headers(int ssl, uws_res_t *res, socketify_header *headers);
   DLL_EXPORT bool socketify_res_write_int_status(int ssl, uws_res_t *res, int code);
+  DLL_EXPORT void socketify_res_end_without_body_with_length(int ssl, uws_res_t *res, size_t length, bool close_connection);
+  DLL_EXPORT void socketify_res_on_data_with_limit(int ssl, uws_res_t *res, socketify_res_on_data_handler handler, socketify_res_limit_handler on_limit, size_t limit, void *user_data);
   DLL_EXPORT socketify_asgi_ws_data socketify_asgi_ws_request(int ssl, uws_req_t *req, uws_res_t *res);
+  DLL_EXPORT void socketify_req_get_parameters(uws_req_t *req, const char **values, size_t *values_sizes, size_t count);
 
   DLL_EXPORT socksocketify_asgi_app_info *socketify_add_asgi_http_handler(int ssl, uws_app_t *app, socketify_asgi_method_handler handler, void *user_data);
   DLL_EXPORT void socketify_destroy_asgi_app_info(socksocketify_asgi_app_info *app);
 
+  DLL_EXPORT socketify_static_response *socketify_create_static_response(int ssl, const char *status, size_t status_size, socketify_header *headers, const char *body, size_t body_size, bool has_body, bool head);
+  DLL_EXPORT void socketify_static_response_handler(uws_res_t *res, uws_req_t *req, void *user_data);
+  DLL_EXPORT void socketify_destroy_static_response(socketify_static_response *response);
+
+  DLL_EXPORT socketify_host_router *socketify_create_host_router();
+  DLL_EXPORT void socketify_host_router_add(socketify_host_router *router, const char *host, size_t host_size, uws_method_handler handler, void *user_data);
+  DLL_EXPORT void socketify_host_router_handler(uws_res_t *res, uws_req_t *req, void *user_data);
+  DLL_EXPORT void socketify_host_router_set_default(socketify_host_router *router, uws_method_handler handler, void *user_data);
+  DLL_EXPORT void socketify_destroy_host_router(socketify_host_router *router);
+
   DLL_EXPORT void socketify_res_cork_write(int ssl, uws_res_t *response, const char *data, size_t length);
   DLL_EXPORT void socketify_res_cork_end(int ssl, uws_res_t *response, const char *data, size_t length, bool close_connection);
 
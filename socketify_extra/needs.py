@@ -0,0 +1,86 @@
+from .uws import ffi, lib
+from .datastructures import Headers
+from .request import header_buffer
+
+
+need_fields = ("url", "full_url", "method", "query", "params", "cookies")
+
+
+class RequestNeeds:
+    # what a route declared it reads, copied out of uWS before the first await
+    # instead of everything preserve() would materialize
+    def __init__(self, needs):
+        headers = []
+        fields = set()
+        for need in needs:
+            (kind, separator, name) = need.partition(":")
+            if not separator:
+                if need in need_fields:
+                    fields.add(need)
+                    continue
+                # a bare name is a header
+                (kind, name) = ("header", need)
+            if kind == "header":
+                if not name:
+                    raise RuntimeError('"%s" is missing a header name' % need)
+                headers.append(name.lower().encode("utf-8"))
+            elif kind == "query":
+                # the query string is kept whole, QueryParams decodes keys lazily
+                fields.add("query")
+            else:
+                raise RuntimeError('"%s" is not a valid request need' % need)
+
+        if "cookies" in fields and b"cookie" not in headers:
+            headers.append(b"cookie")
+        self.needs = tuple(needs)
+        self.headers = tuple(dict.fromkeys(headers))
+        self.url = "url" in fields
+        self.full_url = "full_url" in fields
+        self.method = "method" in fields
+        self.query = "query" in fields
+        self.params = "params" in fields
+
+    def capture(self, request):
+        raw = {}
+        buffer = header_buffer
+        req = request.req
+        for name in self.headers:
+            buffer[0] = ffi.NULL
+            length = lib.uws_req_get_header(req, name, len(name), buffer)
+            if buffer[0] != ffi.NULL:
+                raw[name] = [ffi.unpack(buffer[0], length)]
+        request._headers = Headers(raw)
+
+        if self.query:
+            request.get_queries()
+        elif self.full_url:
+            request.get_full_url()
+        if self.url:
+            request.get_url()
+        if self.method:
+            request.get_method()
+        if self.params or request._parameter_spec is not None:
+            # route parameters are always cheap enough to keep
+            request.get_parameters()
+            if request._parameter_spec is not None:
+                request.get_named_parameters()
+        # preserve() becomes a no-op, everything declared is already copied
+        request._needs = self
+
+    def __repr__(self):
+        return "RequestNeeds(%r)" % (self.needs,)
+
+
+def release_native(request):
+    # runs once the native callback returned, undeclared fields raise from now on
+    if request._needs is not None:
+        request.req = None
+
+
+def needs_prelude(needs):
+    def prelude(response, request):
+        needs.capture(request)
+        response.app.loop.loop.call_soon(release_native, request)
+        return True
+
+    return prelude
@@ -0,0 +1,124 @@
+import uuid
+
+from .uws import ffi, lib, has_native
+
+
+parameter_converters = {
+    "str": str,
+    "int": int,
+    "float": float,
+    "uuid": uuid.UUID,
+}
+
+
+native_parameters = has_native("socketify_req_get_parameters")
+
+
+def parse_parameter_names(path):
+    return tuple(
+        segment[1:] for segment in path.split("/") if segment.startswith(":")
+    )
+
+
+def parse_parameter_segments(path):
+    # "/" separated positions of the parameters, None when a wildcard makes
+    # them depend on the url
+    segments = path.split("/")
+    if any(segment.startswith("*") for segment in segments):
+        return None
+    return tuple(
+        index for index, segment in enumerate(segments) if segment.startswith(":")
+    )
+
+
+class ParameterSpec:
+    # names are parsed once per route, values are read with a single native call.
+    # The libsocketify binaries shipped today lack socketify_req_get_parameters,
+    # there the url is read once and split in Python instead
+    def __init__(self, names, converters=None, path=None):
+        self.names = names
+        self.count = len(names)
+        self.segments = None
+        if path is not None and self.count > 1:
+            # a single uws_req_get_parameter call beats reading the url
+            self.segments = parse_parameter_segments(path)
+        self.converters = ()
+        if converters:
+            compiled = []
+            for name, converter in converters.items():
+                if name not in names:
+                    raise RuntimeError('"%s" is not a parameter of this route' % name)
+                if isinstance(converter, str):
+                    if converter not in parameter_converters:
+                        raise RuntimeError('"%s" is not a valid converter' % converter)
+                    converter = parameter_converters[converter]
+                compiled.append((names.index(name), converter))
+            self.converters = tuple(compiled)
+        self._values = ffi.new("const char*[]", self.count)
+        self._values_sizes = ffi.new("size_t[]", self.count)
+
+    def extract(self, req):
+        values = self._values
+        sizes = self._values_sizes
+        if native_parameters:
+            lib.socketify_req_get_parameters(req, values, sizes, self.count)
+        elif self.segments is not None:
+            return self._extract_from_url(req)
+        else:
+            # one uws call per parameter
+            for i in range(self.count):
+                sizes[i] = lib.uws_req_get_parameter(req, i, values + i)
+        result = []
+        for i in range(self.count):
+            size = sizes[i]
+            if size:
+                try:
+                    result.append(ffi.unpack(values[i], size).decode("utf-8"))
+                except Exception:  # invalid utf-8
+                    result.append(None)
+            else:
+                result.append("")
+        return result
+
+    def _extract_from_url(self, req):
+        # the route matched, so the url has a segment at every parameter position
+        buffer = ffi.new("char**")
+        length = lib.uws_req_get_url(req, buffer)
+        segments = ffi.unpack(buffer[0], length).split(b"/")
+        result = []
+        for index in self.segments:
+            try:
+                result.append(segments[index].decode("utf-8"))
+            except Exception:  # invalid utf-8
+                result.append(None)
+        return result
+
+    def convert(self, values):
+        named = dict(zip(self.names, values))
+        for index, converter in self.converters:
+            name = self.names[index]
+            # raises ValueError if the value does not match the converter
+            named[name] = converter(values[index])
+        return named
+
+
+def parameters_prelude(spec):
+    if spec.converters:
+
+        def prelude(response, request):
+            request._parameter_spec = spec
+            try:
+                request.get_named_parameters()
+            except Exception:
+                # not a match for this route, let uWS try the next one
+                request.set_yield(True)
+                return False
+            return True
+
+    else:
+
+        def prelude(response, request):
+            request._parameter_spec = spec
+            return True
+
+    return prelude
@@ -1,54 +1,74 @@
 from .uws import ffi, lib
-from .background import uws_req_for_each_header_handler
+from .background import uws_req_for_each_header_handler, uws_req_raw_header_handler
+from .datastructures import Headers, QueryParams
 
-from urllib.parse import parse_qs
-from http import cookies
+from .cookies import parse_cookie, parse_cookies
 
 import logging
 import inspect
 
+# out parameter for uws_req_get_header, read right after the call on the loop thread
+header_buffer = ffi.new("char**")
+
+
+def decode_native(pointer, size):
+    try:
+        return ffi.unpack(pointer, size).decode("utf-8")
+    except Exception:  # invalid utf-8
+        return None
+
 
 class AppRequest:
-    def __init__(self, request, app):
+    def __init__(self, request, app, response=None):
         self.req = request
+        # the native response, socketify_asgi_request reads the remote address
+        # from it
+        self._res = response
         self.app = app
         self.read_jar = None
         self.jar_parsed = False
+        self._cookie_header = None
         self._for_each_header_handler = None
         self._ptr = ffi.new_handle(self)
         self._headers = None
         self._params = None
+        self._named_params = None
+        self._parameter_spec = None
+        self._needs = None
         self._query = None
         self._url = None
         self._full_url = None
         self._method = None
 
     def get_cookie(self, name):
+        # only the requested cookie is parsed, results are kept for the request
         if self.read_jar is None:
-            if self.jar_parsed:
-                return None
+            self.read_jar = {}
+        elif name in self.read_jar:
+            return self.read_jar[name]
 
-            if self._headers:
-                raw_cookies = self._headers.get("cookie", None)
-            else:
-                raw_cookies = self.get_header("cookie")
+        if not self.jar_parsed:
+            self._cookie_header = self.get_header("cookie")
+            self.jar_parsed = True
 
-            if raw_cookies:
-                self.jar_parsed = True
-                self.read_jar = cookies.SimpleCookie(raw_cookies)
-            else:
-                self.jar_parsed = True
-                return None
-        try:
-            return self.read_jar[name].value
-        except Exception:
-            return None
+        value = parse_cookie(self._cookie_header, name)
+        self.read_jar[name] = value
+        return value
+
+    def get_cookies(self):
+        if not self.jar_parsed:
+            self.get_cookie("")
+        return parse_cookies(self._cookie_header)
+
+    def get_signed_cookie(self, name):
+        # None when missing or when the signature does not match
+        return self.app.get_cookie_signer().unsign(name, self.get_cookie(name))
 
     def get_url(self):
         if self._url:
             return self._url
         buffer = ffi.new("char**")
-        length = lib.uws_req_get_url(self.req, buffer)
+        length = lib.uws_req_get_url(self._native("url"), buffer)
         buffer_address = ffi.addressof(buffer, 0)[0]
         if buffer_address == ffi.NULL:
             return None
@@ -62,7 +82,7 @@ class AppRequest:
         if self._full_url:
             return self._full_url
         buffer = ffi.new("char**")
-        length = lib.uws_req_get_full_url(self.req, buffer)
+        length = lib.uws_req_get_full_url(self._native("full_url"), buffer)
         buffer_address = ffi.addressof(buffer, 0)[0]
         if buffer_address == ffi.NULL:
             return None
@@ -77,7 +97,7 @@ class AppRequest:
             return self._method
         buffer = ffi.new("char**")
         # will use uws_req_get_case_sensitive_method until version v21 and switch back to uws_req_get_method for 0 impacts on behavior
-        length = lib.uws_req_get_case_sensitive_method(self.req, buffer)
+        length = lib.uws_req_get_case_sensitive_method(self._native("method"), buffer)
         buffer_address = ffi.addressof(buffer, 0)[0]
         if buffer_address == ffi.NULL:
             return None
@@ -91,34 +111,95 @@ class AppRequest:
     def for_each_header(self, handler):
         self._for_each_header_handler = handler
         lib.uws_req_for_each_header(
-            self.req, uws_req_for_each_header_handler, self._ptr
+            self._native(), uws_req_for_each_header_handler, self._ptr
         )
 
+    def _native(self, need=None):
+        # with needs, uWS frees the request after dispatch and only the declared
+        # fields were copied
+        if self.req is None and self._needs is not None:
+            if need is None:
+                raise RuntimeError(
+                    'only the headers declared in needs are kept, use "header:<name>"'
+                )
+            raise RuntimeError('"%s" was not declared in needs' % need)
+        return self.req
+
+    def _snapshot(self):
+        # url, full url, method and every header in a single native call
+        req = self._native()
+        if self._res is None:
+            return self._snapshot_headers(req)
+        data = lib.socketify_asgi_request(self.app.SSL, req, self._res)
+        try:
+            if not self._full_url:
+                self._full_url = decode_native(data.full_url, data.full_url_size)
+            if not self._url:
+                self._url = decode_native(data.url, data.url_size)
+            if not self._method:
+                self._method = decode_native(data.method, data.method_size)
+
+            # keep raw bytes, values are decoded on access by Headers
+            raw = {}
+            header = data.header_list
+            while header != ffi.NULL:
+                name = ffi.unpack(header.name, header.name_size)
+                value = ffi.unpack(header.value, header.value_size)
+                values = raw.get(name, None)
+                if values is None:
+                    raw[name] = [value]
+                else:
+                    values.append(value)
+                header = ffi.cast("socketify_header*", header.next)
+            headers = Headers(raw)
+            if self._needs is None:
+                self._headers = headers
+            return headers
+        finally:
+            lib.socketify_destroy_headers(data.header_list)
+
+    def _snapshot_headers(self, req):
+        # requests built without their native response, one upcall per header
+        raw = {}
+        handle = ffi.new_handle(raw)
+        lib.uws_req_for_each_header(req, uws_req_raw_header_handler, handle)
+        self.get_full_url()
+        self.get_url()
+        self.get_method()
+        headers = Headers(raw)
+        if self._needs is None:
+            self._headers = headers
+        return headers
+
     def get_headers(self):
-        if self._headers is not None:
+        if self._headers is not None and self._needs is None:
             return self._headers
 
-        self._headers = {}
+        # needs keeps only the declared headers
+        return self._snapshot()
 
-        def copy_headers(key, value):
-            self._headers[key] = value
-
-        self.for_each_header(copy_headers)
-        return self._headers
+    @property
+    def headers(self):
+        return self.get_headers()
 
     def get_header(self, lower_case_header):
-        if self._headers is not None:
-            return self._headers.get(lower_case_header, None)
-
         if isinstance(lower_case_header, str):
             data = lower_case_header.encode("utf-8")
         elif isinstance(lower_case_header, bytes):
             data = lower_case_header
         else:
-            data = self.app._json_serializer.dumps(lower_case_header).encode("utf-8")
+            data = self.app._json_serializer.encode(lower_case_header)
 
-        buffer = ffi.new("char**")
-        length = lib.uws_req_get_header(self.req, data, len(data), buffer)
+        if self._headers is not None and (
+            self._needs is None or data in self._needs.headers
+        ):
+            return self._headers.get(lower_case_header, None)
+
+        buffer = header_buffer
+        buffer[0] = ffi.NULL
+        length = lib.uws_req_get_header(
+            self._native("header:%s" % data.decode("utf-8")), data, len(data), buffer
+        )
         buffer_address = ffi.addressof(buffer, 0)[0]
         if buffer_address == ffi.NULL:
             return None
@@ -128,44 +209,35 @@ class AppRequest:
             return None
 
     def get_queries(self):
-        try:
-            if self._query:
-                return self._query
-
-            url = self.get_url()
-            query = self.get_full_url()[len(url) :]
-            if query.startswith("?"):
-                query = query[1:]
-            self._query = parse_qs(query, encoding="utf-8")
+        if self._query is not None:
             return self._query
-        except Exception:
-            self._query = {}
+
+        # only the full url is needed, the query string is whatever follows "?"
+        if not self._full_url:
+            self._native("query")
+        full_url = self.get_full_url()
+        if full_url is None:
+            self._query = QueryParams()
             return None
+        index = full_url.find("?")
+        self._query = QueryParams(full_url[index + 1 :] if index != -1 else "")
+        return self._query
 
     def get_query(self, key):
-        if self._query:
-            return self._query.get(key, None)
-        buffer = ffi.new("char**")
-
-        if isinstance(key, str):
-            key_data = key.encode("utf-8")
-        elif isinstance(key, bytes):
-            key_data = key
-        else:
-            key_data = self.app._json_serializer.dumps(key).encode("utf-8")
-
-        length = lib.uws_req_get_query(self.req, key_data, len(key_data), buffer)
-        buffer_address = ffi.addressof(buffer, 0)[0]
-        if buffer_address == ffi.NULL:
-            return None
-        try:
-            return ffi.unpack(buffer_address, length).decode("utf-8")
-        except Exception:  # invalid utf-8
+        if isinstance(key, bytes):
+            key = key.decode("utf-8")
+        query = self.get_queries()
+        if query is None:
             return None
+        return query.get_first(key)
 
     def get_parameters(self):
         if self._params:
             return self._params
+        if self._parameter_spec is not None:
+            # all parameters of the route at once, see ParameterSpec.extract
+            self._params = self._parameter_spec.extract(self._native("params"))
+            return self._params
         self._params = []
         i = 0
         while True:
@@ -177,6 +249,14 @@ class AppRequest:
             i = i + 1
         return self._params
 
+    def get_named_parameters(self):
+        if self._named_params is not None:
+            return self._named_params
+        if self._parameter_spec is None:
+            return {}
+        self._named_params = self._parameter_spec.convert(self.get_parameters())
+        return self._named_params
+
     def get_parameter(self, index):
         if self._params:
             try:
@@ -186,7 +266,7 @@ class AppRequest:
 
         buffer = ffi.new("char**")
         length = lib.uws_req_get_parameter(
-            self.req, ffi.cast("unsigned short", index), buffer
+            self._native("params"), ffi.cast("unsigned short", index), buffer
         )
         buffer_address = ffi.addressof(buffer, 0)[0]
         if buffer_address == ffi.NULL:
@@ -198,9 +278,18 @@ class AppRequest:
 
     def preserve(self):
         # preserve queries, headers, parameters, method, url and full url
-        self.get_queries()  # queries calls url and full_url so its preserved
-        self.get_headers()
+        if self._needs is not None:
+            # the route declared what it reads and it was copied on dispatch,
+            # anything else raises once uWS released the request
+            return self
+        if self._headers is None:
+            # headers, url, full_url and method in one go
+            self._snapshot()
+        self.get_queries()  # queries calls full_url so its preserved
+        self.get_url()
         self.get_parameters()
+        if self._parameter_spec is not None:
+            self.get_named_parameters()
         self.get_method()
         return self
 
@@ -1,8 +1,6 @@
 from typing import Union
-from http import cookies
-from datetime import datetime
-from io import BytesIO
-from urllib.parse import quote_plus, parse_qs, unquote_plus
+from collections.abc import Mapping
+from urllib.parse import quote_plus
 
 import uuid
 import inspect
@@ -10,10 +8,37 @@ import logging
 
 from .background import (
     uws_generic_cork_handler, uws_generic_aborted_handler,
-    uws_generic_on_data_handler, uws_generic_on_writable_handler
+    uws_generic_on_data_handler, uws_generic_on_writable_handler,
+    uws_generic_body_limit_handler, uws_generic_on_data_with_limit_handler
 )
-from .uws import lib, ffi
+from .uws import lib, ffi, has_native
 from .request import AppRequest
+from .cookies import serialize_cookie
+from .streams import BodyStream, BodyReader
+from .multipart import MultipartReader
+from .forms import parse_urlencoded, FormParser
+from .status_codes import status_codes
+from .datastructures import HeaderSet, encode_headers, pack_headers
+
+
+native_head_length = has_native("socketify_res_end_without_body_with_length")
+native_body_limit = has_native("socketify_res_on_data_with_limit")
+
+# packing a socketify_header list costs about four uws_res_write_header calls
+# plus half a call per header, shorter lists are written one call each
+pack_threshold = 16
+
+
+def encode_status(status):
+    if isinstance(status, int):
+        line = status_codes.get(status, None)
+        if line is None:
+            raise RuntimeError('"%d" Is not an valid Status Code' % status)
+        return line
+    if isinstance(status, str):
+        return status.encode("utf-8")
+    return status
+
 
 class AppResponse:
     def __init__(self, response, app):
@@ -31,6 +56,22 @@ class AppResponse:
         self._chunkFuture = None
         self._dataFuture = None
         self._data = None
+        self._recorder = None
+        self._head = False
+        self._max_body_size = None
+        self._body_size = 0
+        self._body_reader = None
+        self._body_decoder = None
+        self._pending_status = None
+        self._detached = False
+        self._on_release = None
+
+    def _release(self):
+        # a detached response was answered, the factory may recycle it now
+        on_release = self._on_release
+        if on_release is not None:
+            self._on_release = None
+            on_release()
 
     def cork(self, callback):
         self.app.loop.is_idle = False
@@ -43,24 +84,108 @@ class AppResponse:
             )
 
     def set_cookie(self, name, value, options):
-        if options is None:
-            options = {}
         if self._write_jar is None:
-            self._write_jar = cookies.SimpleCookie()
-        self._write_jar[name] = quote_plus(value)
-        if isinstance(options, dict):
-            for key in options:
-                if key == "expires" and isinstance(options[key], datetime):
-                    self._write_jar[name][key] = options[key].strftime(
-                        "%a, %d %b %Y %H:%M:%S GMT"
-                    )
-                else:
-                    self._write_jar[name][key] = options[key]
+            self._write_jar = []
+        # one serialized Set-Cookie value per cookie
+        self._write_jar.append(serialize_cookie(name, quote_plus(value), options))
+
+    def set_signed_cookie(self, name, value, options=None):
+        signed_value = self.app.get_cookie_signer().sign(name, value)
+        if self._write_jar is None:
+            self._write_jar = []
+        self._write_jar.append(serialize_cookie(name, signed_value, options))
+
+    def _write_cookies(self):
+        cookies = self._write_jar
+        self._write_jar = None
+        if self._recorder is not None:
+            # responses setting cookies are never shared
+            self._recorder.discard()
+            self._recorder = None
+        self._write_header_list([(b"Set-Cookie", cookie) for cookie in cookies])
+
+    def _write_head(self):
+        # write_status only records the status, it goes out before the first
+        # header or the body so a header list can share its native call
+        status = self._pending_status
+        self._pending_status = None
+        if isinstance(status, int):
+            lib.socketify_res_write_int_status(self.app.SSL, self.res, status)
+        else:
+            lib.uws_res_write_status(self.app.SSL, self.res, status, len(status))
+
+    def _write_header_set(self, headers):
+        # the native list was packed when the HeaderSet was compiled
+        status = self._pending_status
+        if isinstance(status, int):
+            self._pending_status = None
+            lib.socketify_res_write_int_status_with_headers(
+                self.app.SSL, self.res, status, headers.native
+            )
+            return
+        if status is not None:
+            self._write_head()
+        lib.socketify_res_write_headers(self.app.SSL, self.res, headers.native)
+
+    def _write_header_list(self, headers):
+        # [(name, value), ...] as bytes, long lists are packed and written in a
+        # single call together with the pending status
+        ssl = self.app.SSL
+        if len(headers) < pack_threshold:
+            if self._pending_status is not None:
+                self._write_head()
+            for name, value in headers:
+                lib.uws_res_write_header(ssl, self.res, name, len(name), value, len(value))
+            return
+        (header_list, buffer) = pack_headers(headers)
+        status = self._pending_status
+        if isinstance(status, int):
+            self._pending_status = None
+            lib.socketify_res_write_int_status_with_headers(
+                ssl, self.res, status, header_list
+            )
+            return
+        if self._pending_status is not None:
+            self._write_head()
+        lib.socketify_res_write_headers(ssl, self.res, header_list)
+
+    def trigger_body_limit(self):
+        # libsocketify already answered 413 and closed the connection
+        self._fail_body("Request body too large")
+
+    def trigger_encoded_data(self, data, is_end):
+        # Content-Encoding is undone here, data handlers only see plain bytes
+        if self.aborted:
+            return self
+        decoder = self._body_decoder
+        try:
+            data = decoder.decompress(data, is_end)
+        except Exception as err:
+            self._body_decoder = None
+            self.write_status(413 if decoder.too_large else 400).end_without_body(True)
+            self._fail_body(str(err))
+            return self
+        return self.trigger_data_handler(data, is_end)
+
+    def _fail_body(self, message):
+        # the response was already answered, uWS can still deliver chunks it
+        # parsed from the same read so the handle stays valid and they are
+        # dropped by the aborted checks
+        future = self._dataFuture
+        if future is not None and not future.done():
+            future.set_exception(RuntimeError(message))
+        self._abort()
 
     def trigger_aborted(self):
-        self.aborted = True
         self._ptr = ffi.NULL
         self.res = ffi.NULL
+        return self._abort()
+
+    def _abort(self):
+        self.aborted = True
+        if self._recorder is not None:
+            self._recorder.abort()
+            self._recorder = None
         if hasattr(self, "_aborted_handler") and hasattr(
             self._aborted_handler, "__call__"
         ):
@@ -109,37 +234,37 @@ class AppResponse:
     async def get_form_urlencoded(self, encoding="utf-8"):
         data = await self.get_data()
         try:
-            # decode and unquote all
-            result = {}
-            parsed = parse_qs(data.getvalue(), encoding=encoding)
-            has_value = False
-            for key in parsed:
-                has_value = True
-                try:
-                    value = parsed[key]
-                    new_key = key.decode(encoding)
-                    last_value = value[len(value) - 1]
-
-                    result[new_key] = unquote_plus(last_value.decode(encoding))
-                except Exception:
-                    pass
-            return result if has_value else None
+            form = parse_urlencoded(data, encoding)
         except Exception:
             return None  # invalid encoding
+        return form if form else None
+
+    async def form_stream(self, encoding="utf-8", high_water_mark=1024 * 1024, **options):
+        # async for (key, value) in res.form_stream(), for forms too large to buffer
+        parser = FormParser(encoding, **options)
+        async for chunk in BodyStream(self, high_water_mark):
+            for item in parser.feed(chunk):
+                yield item
+        for item in parser.close():
+            yield item
 
     async def get_text(self, encoding="utf-8"):
         data = await self.get_data()
         try:
-            return data.getvalue().decode(encoding)
+            return data.decode(encoding)
         except Exception:
             return None  # invalid encoding
 
-    def get_json(self):
-        data = self.get_data()
+    async def get_json(self, schema=None):
+        # the raw body goes to the decoder as is, no str in between
+        data = await self.get_data()
+        if schema is not None:
+            # validation errors are raised, the caller decides the response
+            return self.app._json_serializer.decode(data, schema)
         try:
-            return self.app._json_serializer.loads(data.getvalue().decode("utf-8"))
+            return self.app._json_serializer.decode(data)
         except Exception:
-            return None
+            return None  # invalid json
 
     def send_chunk(self, buffer, total_size):
         self._chunkFuture = self.app.loop.create_future()
@@ -185,27 +310,31 @@ class AppResponse:
 
     def get_data(self):
         self._dataFuture = self.app.loop.create_future()
-        self._data = BytesIO()
+        self._body_reader = BodyReader(self._dataFuture)
 
         def is_aborted(self):
             self.aborted = True
             try:
-                if not self._dataFuture.done():
-                    self._dataFuture.set_result(self._data)
+                reader = self._body_reader
+                if reader is not None:
+                    reader.end()
             except Exception:
                 pass
 
-        def get_chunks(self, chunk, is_end):
-            if chunk is not None:
-                self._data.write(chunk)
-            if is_end:
-                self._dataFuture.set_result(self._data)
-                self._data = None
-
         self.on_aborted(is_aborted)
-        self.on_data(get_chunks)
+        self.on_data(self._body_reader)
         return self._dataFuture
 
+    def body_stream(self, high_water_mark=1024 * 1024, low_water_mark=None):
+        # async for chunk in res.body_stream(), constant memory for large uploads
+        return BodyStream(self, high_water_mark, low_water_mark)
+
+    def multipart_stream(self, content_type, high_water_mark=1024 * 1024, **options):
+        # async for part in res.multipart_stream(req.get_header("content-type"))
+        return MultipartReader(
+            BodyStream(self, high_water_mark), content_type, **options
+        )
+
     def grab_aborted_handler(self):
         # only needed if is async
         if not self.aborted and not self._grabbed_abort_handler_once:
@@ -238,9 +367,13 @@ class AppResponse:
         try:
             if self.aborted:
                 return False, True
+            if self._recorder is not None:
+                self._recorder.discard()
+                self._recorder = None
             if self._write_jar is not None:
-                self.write_header("Set-Cookie", self._write_jar.output(header=""))
-                self._write_jar = None
+                self._write_cookies()
+            if self._pending_status is not None:
+                self._write_head()
             if isinstance(message, str):
                 data = message.encode("utf-8")
             elif isinstance(message, bytes):
@@ -328,9 +461,64 @@ class AppResponse:
         headers=None,
         end_connection: bool = False,
     ):
-        # TODO: use socketify_res_cork_send_int_code and socketify_res_cork_send after optimize headers
-        self.cork(
-            lambda res: res.send(message, content_type, status, headers, end_connection)
+        self.app.loop.is_idle = False
+        if self.aborted:
+            return self
+        if headers is not None or self._write_jar is not None or self._head:
+            # headers go out one call each, inside the cork callback
+            self.cork(
+                lambda res: res.send(message, content_type, status, headers, end_connection)
+            )
+            return self
+        self.grab_aborted_handler()
+        if isinstance(message, str):
+            data = message.encode("utf-8")
+        elif isinstance(message, bytes):
+            data = message
+        elif message is None:
+            data = None
+        else:
+            data = self.app._json_serializer.encode(message)
+            content_type = b"application/json"
+        if isinstance(content_type, str):
+            content_type = content_type.encode("utf-8")
+
+        if self._recorder is not None:
+            if status != b"200 OK":
+                # the recorder assumes 200 when no status was written
+                self._recorder.write_status(status)
+            self._recorder.finish(content_type, data)
+            self._recorder = None
+
+        # cork, status, Content-Type and body in a single native call, the
+        # status from write_status wins like the first writeStatus in uWS
+        if self._pending_status is not None:
+            status = self._pending_status
+            self._pending_status = None
+        if isinstance(status, int):
+            lib.socketify_res_cork_send_int_code(
+                self.app.SSL,
+                self.res,
+                ffi.NULL if data is None else data,
+                0 if data is None else len(data),
+                status,
+                content_type,
+                len(content_type),
+                1 if end_connection else 0,
+            )
+            return self
+        if isinstance(status, str):
+            status = status.encode("utf-8")
+        lib.socketify_res_cork_send(
+            self.app.SSL,
+            self.res,
+            ffi.NULL if data is None else data,
+            0 if data is None else len(data),
+            status,
+            len(status),
+            content_type,
+            len(content_type),
+            1 if end_connection else 0,
         )
         return self
 
@@ -344,22 +532,29 @@ class AppResponse:
     ):
         self.app.loop.is_idle = False
         
-        # TODO: optimize headers
         if headers is not None:
-            for name, value in headers:
-                self.write_header(name, value)
+            self.write_headers(headers)
         try:
 
-            # TODO: optimize Set-Cookie
             if self._write_jar is not None:
-                self.write_header("Set-Cookie", self._write_jar.output(header=""))
-                self._write_jar = None
+                self._write_cookies()
 
             if isinstance(message, str):
                 data = message.encode("utf-8")
             elif isinstance(message, bytes):
                 data = message
             elif message is None:
+                if self._recorder is not None:
+                    if status != b"200 OK":
+                        # the recorder assumes 200 when no status was written
+                        self._recorder.write_status(status)
+                    self._recorder.finish(content_type, None)
+                    self._recorder = None
+                if self._head:
+                    self._end_head(status, content_type, None, end_connection)
+                    return self
+                if self._pending_status is not None:
+                    self._write_head()
                 if isinstance(status, int):
                     lib.socketify_res_send_int_code(
                         self.app.SSL,
@@ -398,9 +593,22 @@ class AppResponse:
                     )
                 return self
             else:
-                data = self.app._json_serializer.dumps(message).encode("utf-8")
+                data = self.app._json_serializer.encode(message)
                 content_type = b"application/json"
 
+            if self._recorder is not None:
+                if status != b"200 OK":
+                    # the recorder assumes 200 when no status was written
+                    self._recorder.write_status(status)
+                self._recorder.finish(content_type, data)
+                self._recorder = None
+
+            if self._head:
+                self._end_head(status, content_type, data, end_connection)
+                return self
+
+            if self._pending_status is not None:
+                self._write_head()
             if isinstance(status, int):
                 lib.socketify_res_send_int_code(
                     self.app.SSL,
@@ -441,6 +649,34 @@ class AppResponse:
         finally:
             return self
 
+    def _end_head(self, status, content_type, data, end_connection):
+        # HEAD answered by a GET handler, keep the Content-Length but drop the body
+        self.write_status(status)
+        if content_type:
+            self.write_header(b"Content-Type", content_type)
+        if self._pending_status is not None:
+            self._write_head()
+        if data is None:
+            lib.uws_res_end_without_body(
+                self.app.SSL, self.res, 1 if end_connection else 0
+            )
+        else:
+            self._end_without_body_with_length(len(data), end_connection)
+
+    def _end_without_body_with_length(self, length, end_connection=False):
+        # HEAD answered by a GET handler, Content-Length of the body it would send
+        if native_head_length:
+            lib.socketify_res_end_without_body_with_length(
+                self.app.SSL, self.res, length, 1 if end_connection else 0
+            )
+            return
+        # uWS only writes Content-Length itself when a length is reported
+        length_data = b"%d" % length
+        lib.uws_res_write_header(
+            self.app.SSL, self.res, b"Content-Length", 14, length_data, len(length_data)
+        )
+        lib.uws_res_end_without_body(self.app.SSL, self.res, 1 if end_connection else 0)
+
     def end(self, message, end_connection=False):
         self.app.loop.is_idle = False
         
@@ -448,8 +684,7 @@ class AppResponse:
             if self.aborted:
                 return self
             if self._write_jar is not None:
-                self.write_header("Set-Cookie", self._write_jar.output(header=""))
-                self._write_jar = None
+                self._write_cookies()
             if isinstance(message, str):
                 data = message.encode("utf-8")
             elif isinstance(message, bytes):
@@ -459,7 +694,15 @@ class AppResponse:
                 return self
             else:
                 self.write_header(b"Content-Type", b"application/json")
-                data = self.app._json_serializer.dumps(message).encode("utf-8")
+                data = self.app._json_serializer.encode(message)
+            if self._recorder is not None:
+                self._recorder.finish(None, data)
+                self._recorder = None
+            if self._pending_status is not None:
+                self._write_head()
+            if self._head:
+                self._end_without_body_with_length(len(data), end_connection)
+                return self
             lib.uws_res_end(
                 self.app.SSL, self.res, data, len(data), 1 if end_connection else 0
             )
@@ -486,27 +729,22 @@ class AppResponse:
     def write_status(self, status_or_status_text):
         self.app.loop.is_idle = False
         if not self.aborted:
+            if self._recorder is not None:
+                self._recorder.write_status(status_or_status_text)
             if isinstance(status_or_status_text, int):
-                if bool(
-                    lib.socketify_res_write_int_status(
-                        self.app.SSL, self.res, status_or_status_text
+                if status_or_status_text not in status_codes:
+                    raise RuntimeError(
+                        '"%d" Is not an valid Status Code' % status_or_status_text
                     )
-                ):
-                    return self
-                raise RuntimeError(
-                    '"%d" Is not an valid Status Code' % status_or_status_text
-                )
-
-            elif isinstance(status_or_status_text, str):
-                data = status_or_status_text.encode("utf-8")
-            elif isinstance(status_or_status_text, bytes):
+                # written with socketify_res_write_int_status
                 data = status_or_status_text
+            elif isinstance(status_or_status_text, (str, bytes)):
+                data = encode_status(status_or_status_text)
             else:
-                data = self.app._json_serializer.dumps(status_or_status_text).encode(
-                    "utf-8"
-                )
-
-            lib.uws_res_write_status(self.app.SSL, self.res, data, len(data))
+                data = self.app._json_serializer.encode(status_or_status_text)
+            # uWS keeps the first status written, so does the pending status
+            if self._pending_status is None:
+                self._pending_status = data
         return self
 
     def write_header(self, key, value):
@@ -517,7 +755,13 @@ class AppResponse:
             elif isinstance(key, bytes):
                 key_data = key
             else:
-                key_data = self.app._json_serializer.dumps(key).encode("utf-8")
+                key_data = self.app._json_serializer.encode(key)
+
+            if self._recorder is not None:
+                self._recorder.write_header(key, value)
+            if self._pending_status is not None:
+                if self._pending_status is not None:
+                    self._write_head()
 
             if isinstance(value, int):
                 lib.uws_res_write_header_int(
@@ -527,12 +771,13 @@ class AppResponse:
                     len(key_data),
                     ffi.cast("uint64_t", value),
                 )
+                return self
             elif isinstance(value, str):
                 value_data = value.encode("utf-8")
             elif isinstance(value, bytes):
                 value_data = value
             else:
-                value_data = self.app._json_serializer.dumps(value).encode("utf-8")
+                value_data = self.app._json_serializer.encode(value)
             lib.uws_res_write_header(
                 self.app.SSL,
                 self.res,
@@ -543,11 +788,41 @@ class AppResponse:
             )
         return self
 
+    def write_headers(self, headers, extra=None):
+        # headers is a HeaderSet compiled once at import time, extra are the
+        # few per request headers written after it
+        self.app.loop.is_idle = False
+        if not self.aborted:
+            if isinstance(headers, HeaderSet):
+                if self._recorder is not None:
+                    for name, value in headers.headers:
+                        self._recorder.write_header(name, value)
+                if headers.native is not None:
+                    self._write_header_set(headers)
+            else:
+                headers = encode_headers(headers)
+                if self._recorder is not None:
+                    for name, value in headers:
+                        self._recorder.write_header(name, value)
+                if headers:
+                    self._write_header_list(headers)
+            if extra is not None:
+                if isinstance(extra, Mapping):
+                    extra = extra.items()
+                for name, value in extra:
+                    self.write_header(name, value)
+        return self
+
     def end_without_body(self, end_connection=False):
         self.app.loop.is_idle = False
         if not self.aborted:
             if self._write_jar is not None:
-                self.write_header("Set-Cookie", self._write_jar.output(header=""))
+                self._write_cookies()
+            if self._recorder is not None:
+                self._recorder.finish(None, None)
+                self._recorder = None
+            if self._pending_status is not None:
+                self._write_head()
             lib.uws_res_end_without_body(
                 self.app.SSL, self.res, 1 if end_connection else 0
             )
@@ -556,12 +831,17 @@ class AppResponse:
     def write(self, message):
         self.app.loop.is_idle = False
         if not self.aborted:
+            if self._recorder is not None:
+                self._recorder.discard()
+                self._recorder = None
             if isinstance(message, str):
                 data = message.encode("utf-8")
             elif isinstance(message, bytes):
                 data = message
             else:
-                data = self.app._json_serializer.dumps(message).encode("utf-8")
+                data = self.app._json_serializer.encode(message)
+            if self._pending_status is not None:
+                self._write_head()
             lib.uws_res_write(self.app.SSL, self.res, data, len(data))
         return self
 
@@ -585,10 +865,31 @@ class AppResponse:
         if not self.aborted:
             if hasattr(handler, "__call__"):
                 self._data_handler = handler
+                # get_data() is fed straight from native memory by background
+                self._body_reader = handler if isinstance(handler, BodyReader) else None
                 self.grab_aborted_handler()
-                lib.uws_res_on_data(
-                    self.app.SSL, self.res, uws_generic_on_data_handler, self._ptr
-                )
+                if self._max_body_size is not None and native_body_limit:
+                    # running total checked in libsocketify, chunks past the
+                    # limit never reach Python
+                    lib.socketify_res_on_data_with_limit(
+                        self.app.SSL,
+                        self.res,
+                        uws_generic_on_data_handler,
+                        uws_generic_body_limit_handler,
+                        self._max_body_size,
+                        self._ptr,
+                    )
+                elif self._max_body_size is not None:
+                    lib.uws_res_on_data(
+                        self.app.SSL,
+                        self.res,
+                        uws_generic_on_data_with_limit_handler,
+                        self._ptr,
+                    )
+                else:
+                    lib.uws_res_on_data(
+                        self.app.SSL, self.res, uws_generic_on_data_handler, self._ptr
+                    )
         return self
 
     def upgrade(
@@ -630,6 +931,8 @@ class AppResponse:
             # keep alive data
             self.app._socket_refs[_id] = user_data_ptr
 
+        if self._pending_status is not None:
+            self._write_head()
         lib.uws_res_upgrade(
             self.app.SSL,
             self.res,
@@ -705,7 +1008,7 @@ class RequestResponseFactory:
             self.app._response_extension.set_properties(response)
             # bind methods to response
             self.app._response_extension.bind_methods(response)
-            request = AppRequest(req, app)
+            request = AppRequest(req, app, res)
             # set default value in properties
             self.app._request_extension.set_properties(request)
             # bind methods to request
@@ -716,18 +1019,20 @@ class RequestResponseFactory:
         (response, request, _) = instances
         response.res = res
         request.req = req
+        request._res = res
         return instances
 
     def _get(self, app, res, req):
         if len(self.factory_queue) == 0:
             response = AppResponse(res, app)
-            request = AppRequest(req, app)
+            request = AppRequest(req, app, res)
             return response, request, False
 
         instances = self.factory_queue.pop()
         (response, request, _) = instances
         response.res = res
         request.req = req
+        request._res = res
         return instances
 
     def _dispose_with_extension(self, instances):
@@ -745,15 +1050,29 @@ class RequestResponseFactory:
         res._chunkFuture = None
         res._dataFuture = None
         res._data = None
+        res._recorder = None
+        res._pending_status = None
+        res._detached = False
+        res._on_release = None
+        res._head = False
+        res._max_body_size = None
+        res._body_size = 0
+        res._body_reader = None
+        res._body_decoder = None
         # set default value in properties
         self.app._response_extension.set_properties(res)
         # dispose req
         req.req = None
+        req._res = None
         req.read_jar = None
         req.jar_parsed = False
+        req._cookie_header = None
         req._for_each_header_handler = None
         req._headers = None
         req._params = None
+        req._named_params = None
+        req._parameter_spec = None
+        req._needs = None
         req._query = None
         req._url = None
         req._full_url = None
@@ -785,13 +1104,27 @@ class RequestResponseFactory:
         res._chunkFuture = None
         res._dataFuture = None
         res._data = None
+        res._recorder = None
+        res._pending_status = None
+        res._detached = False
+        res._on_release = None
+        res._head = False
+        res._max_body_size = None
+        res._body_size = 0
+        res._body_reader = None
+        res._body_decoder = None
         # dispose req
         req.req = None
+        req._res = None
         req.read_jar = None
         req.jar_parsed = False
+        req._cookie_header = None
         req._for_each_header_handler = None
         req._headers = None
         req._params = None
+        req._named_params = None
+        req._parameter_spec = None
+        req._needs = None
         req._query = None
         req._url = None
         req._full_url = None
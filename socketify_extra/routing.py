@@ -0,0 +1,476 @@
+from .uws import ffi, lib, has_native
+from .helpers import middleware
+from .dispatch import create_dispatcher, create_resume
+from .params import ParameterSpec, parse_parameter_names, parameters_prelude
+from .cache import cache_prelude
+from .needs import RequestNeeds, needs_prelude
+from .content_encoding import BodyDecoder, supported_encodings
+from .static_response import StaticResponse
+from .uwebsocket_cffi import uws_generic_dispatch_handler
+from .request import header_buffer
+
+
+native_register = {
+    "GET": lib.uws_app_get,
+    "POST": lib.uws_app_post,
+    "OPTIONS": lib.uws_app_options,
+    "DELETE": lib.uws_app_delete,
+    "PATCH": lib.uws_app_patch,
+    "PUT": lib.uws_app_put,
+    "HEAD": lib.uws_app_head,
+    "CONNECT": lib.uws_app_connect,
+    "TRACE": lib.uws_app_trace,
+    "*": lib.uws_app_any,
+}
+
+
+native_hosts = has_native("socketify_create_host_router") and has_native(
+    "socketify_host_router_set_default"
+)
+
+
+def normalize_host(host):
+    if isinstance(host, bytes):
+        host = host.decode("utf-8")
+    if not isinstance(host, str) or not host:
+        raise RuntimeError("host need to be an non empty String or Bytes")
+    host = host.lower()
+    # same normalization libsocketify applies to the Host header
+    colon = host.rfind(":")
+    if colon != -1 and "]" not in host[colon:]:
+        host = host[:colon]
+    return host
+
+
+def head_prelude(response, request):
+    response._head = True
+    return True
+
+
+def body_limit_prelude(limit):
+    def prelude(response, request):
+        response._max_body_size = limit
+        content_length = request.get_header("content-length")
+        if content_length is not None:
+            try:
+                too_large = int(content_length) > limit
+            except ValueError:
+                too_large = False
+            if too_large:
+                # rejected before a single body byte is read
+                response.write_status(413).end_without_body(True)
+                return False
+        return True
+
+    return prelude
+
+
+def decompress_prelude(max_size):
+    accept_encoding = ", ".join(supported_encodings())
+
+    def prelude(response, request):
+        content_encoding = request.get_header("content-encoding")
+        if content_encoding is None:
+            return True
+        try:
+            response._body_decoder = BodyDecoder.create(content_encoding, max_size)
+        except RuntimeError:
+            response.write_status(415).write_header(
+                "Accept-Encoding", accept_encoding
+            ).end_without_body()
+            return False
+        return True
+
+    return prelude
+
+
+def chain_preludes(preludes):
+    if len(preludes) == 0:
+        return None
+    if len(preludes) == 1:
+        return preludes[0]
+
+    def prelude(response, request):
+        for step in preludes:
+            if not step(response, request):
+                return False
+        return True
+
+    return prelude
+
+
+class Route:
+    __slots__ = (
+        "methods",
+        "path",
+        "handler",
+        "middlewares",
+        "parameters",
+        "converters",
+        "cache",
+        "static",
+        "host",
+        "head",
+        "needs",
+        "max_body_size",
+        "decompress",
+        "max_decompressed_size",
+    )
+
+    def __init__(
+        self,
+        methods,
+        path,
+        handler,
+        middlewares=(),
+        converters=None,
+        cache=None,
+        static=None,
+        host=None,
+        head=False,
+        needs=None,
+        max_body_size=None,
+        decompress=None,
+        max_decompressed_size=None,
+    ):
+        self.methods = methods
+        self.path = path
+        self.handler = handler
+        self.middlewares = middlewares
+        self.parameters = parse_parameter_names(path)
+        self.converters = converters
+        self.cache = cache
+        self.static = static
+        self.host = host
+        self.head = head
+        self.needs = needs
+        self.max_body_size = max_body_size
+        self.decompress = decompress
+        self.max_decompressed_size = max_decompressed_size
+
+    def get_key(self):
+        # routes with the same key share the compiled handler and native handle
+        converters = None
+        if self.converters:
+            converters = tuple(sorted(self.converters.items()))
+        return (
+            self.handler,
+            self.middlewares,
+            self.parameters,
+            converters,
+            self.cache,
+            self.head,
+            self.needs.needs if self.needs is not None else None,
+            self.max_body_size,
+            self.decompress,
+            self.max_decompressed_size,
+        )
+
+    def create_prelude(self, app, handler):
+        preludes = []
+        if self.head:
+            preludes.append(head_prelude)
+        max_body_size = self.max_body_size
+        if max_body_size is None:
+            max_body_size = app._max_body_size
+        if max_body_size is not None:
+            preludes.append(body_limit_prelude(max_body_size))
+        decompress = self.decompress
+        if decompress is None:
+            decompress = app._decompress
+        if decompress:
+            max_decompressed_size = self.max_decompressed_size
+            if max_decompressed_size is None:
+                max_decompressed_size = app._max_decompressed_size
+            preludes.append(decompress_prelude(max_decompressed_size))
+        if self.parameters:
+            spec = ParameterSpec(self.parameters, self.converters, self.path)
+            preludes.append(parameters_prelude(spec))
+        if self.cache is not None:
+            preludes.append(
+                cache_prelude(
+                    app.get_response_cache(), self.cache, create_resume(app, handler)
+                )
+            )
+        if self.needs is not None:
+            preludes.append(needs_prelude(self.needs))
+        return chain_preludes(preludes)
+
+    def __repr__(self):
+        if self.host is not None:
+            return "Route(%s %s%s)" % ("|".join(self.methods), self.host, self.path)
+        return "Route(%s %s)" % ("|".join(self.methods), self.path)
+
+
+class HostDispatcher:
+    # Host header -> handler lookup for one method and path. Builds exporting
+    # socketify_create_host_router do it in C++, the binaries shipped today do
+    # not and run dispatch() from Python
+    def __init__(self):
+        self.hosts = {}
+        if native_hosts:
+            self.ptr = lib.socketify_create_host_router()
+            self.handler = lib.socketify_host_router_handler
+            self.user_data = self.ptr
+        else:
+            # one uws_req_get_header call and a dict lookup per request
+            self.ptr = None
+            self.routes = {}
+            self.handler = uws_generic_dispatch_handler
+            self.user_data = ffi.new_handle(self.dispatch)
+        # the route without a host on the same method and path
+        self.default = None
+
+    def add(self, host, handler, user_data):
+        if self.ptr is not None:
+            host_data = host.encode("utf-8")
+            lib.socketify_host_router_add(
+                self.ptr, host_data, len(host_data), handler, user_data
+            )
+        else:
+            self.routes[host] = (handler, user_data)
+        self.hosts[host] = user_data  # Keep alive handler
+
+    def set_default(self, handler, user_data):
+        if self.ptr is not None:
+            lib.socketify_host_router_set_default(self.ptr, handler, user_data)
+        self.default = (handler, user_data)
+
+    def dispatch(self, res, req):
+        buffer = header_buffer
+        buffer[0] = ffi.NULL
+        length = lib.uws_req_get_header(req, b"host", 4, buffer)
+        host = ""
+        if buffer[0] != ffi.NULL:
+            host = ffi.unpack(buffer[0], length).decode("latin-1").lower()
+            colon = host.rfind(":")
+            if colon != -1 and "]" not in host[colon:]:
+                host = host[:colon]
+        route = self.routes.get(host, None)
+        if route is None:
+            route = self.default
+        if route is None:
+            # no route for this host, let uWS try the next handler
+            lib.uws_req_set_yield(req, 1)
+            return
+        (handler, user_data) = route
+        handler(res, req, user_data)
+
+    def __del__(self):
+        try:
+            if self.ptr is not None:
+                lib.socketify_destroy_host_router(self.ptr)
+                self.ptr = None
+        except Exception:
+            pass
+
+
+class RouteTable:
+    def __init__(self, app):
+        self.app = app
+        self.routes = []
+        self.committed = False
+        self._pending = []
+        # HEAD/OPTIONS/405 routes made by auto_methods, their static responses
+        # own the native user_data registered with uWS
+        self._automatic = []
+        # one native handle per distinct handler + middlewares combination
+        self._handles = {}
+        # (method, path) -> HostDispatcher shared by every host using that route
+        self._hosts = {}
+        # (method, path) -> (handler, user_data) registered without a host, uWS
+        # answers with the last registration so these become host defaults
+        self._globals = {}
+
+    def add(
+        self,
+        methods,
+        path,
+        handler,
+        middlewares=(),
+        converters=None,
+        cache=None,
+        host=None,
+        needs=None,
+        max_body_size=None,
+        decompress=None,
+        max_decompressed_size=None,
+    ):
+        methods = tuple(method.upper() for method in methods)
+        for method in methods:
+            if method not in native_register:
+                raise RuntimeError('"%s" is not a supported HTTP method' % method)
+        if cache is not None and any(
+            method not in ("GET", "HEAD") for method in methods
+        ):
+            raise RuntimeError("cache is only supported on GET and HEAD routes")
+        if cache is not None and middlewares:
+            # cached responses are replayed before the middlewares would run
+            raise RuntimeError("cache is not supported on routes with middlewares")
+        if max_body_size is not None and max_body_size < 0:
+            raise RuntimeError("max_body_size must be 0 or greater")
+        if max_decompressed_size is not None and max_decompressed_size < 0:
+            raise RuntimeError("max_decompressed_size must be 0 or greater")
+
+        if host is not None:
+            host = normalize_host(host)
+        if needs is not None:
+            needs = RequestNeeds(needs)
+
+        route = Route(
+            methods,
+            path,
+            handler,
+            tuple(middlewares),
+            converters,
+            cache,
+            host=host,
+            needs=needs,
+            max_body_size=max_body_size,
+            decompress=decompress,
+            max_decompressed_size=max_decompressed_size,
+        )
+        return self._add(route)
+
+    def add_static(self, methods, path, static):
+        methods = tuple(method.upper() for method in methods)
+        for method in methods:
+            if method not in native_register:
+                raise RuntimeError('"%s" is not a supported HTTP method' % method)
+        return self._add(Route(methods, path, None, static=static))
+
+    def _add(self, route):
+        self.routes.append(route)
+        if self.committed:
+            # already listening, register right away
+            self._register(route)
+        else:
+            self._pending.append(route)
+        return route
+
+    def commit(self):
+        # register everything collected so far with uWS in one pass
+        pending = self._pending
+        self._pending = []
+        self.committed = True
+        if self.app._auto_methods:
+            automatic = self._automatic_routes(pending)
+            self._automatic.extend(automatic)
+            pending.extend(automatic)
+        for route in pending:
+            self._register(route)
+        return self
+
+    def _automatic_routes(self, routes):
+        # HEAD from GET, OPTIONS with Allow and a 405 for every other method,
+        # all decided here so none of them enter user code
+        allowed = {}
+        get_routes = {}
+        skip_405 = set()
+        for route in routes:
+            if route.host is not None:
+                continue
+            methods = allowed.setdefault(route.path, set())
+            methods.update(route.methods)
+            if "GET" in route.methods and route.path not in get_routes:
+                get_routes[route.path] = route
+            if route.converters:
+                # converters can yield to another route, a 405 would hide it
+                skip_405.add(route.path)
+
+        automatic = []
+        for path, methods in allowed.items():
+            if "*" in methods:
+                continue
+            get_route = get_routes.get(path, None)
+            if get_route is not None and "HEAD" not in methods:
+                automatic.append(
+                    Route(
+                        ("HEAD",),
+                        path,
+                        get_route.handler,
+                        get_route.middlewares,
+                        get_route.converters,
+                        get_route.cache,
+                        static=get_route.static,
+                        head=True,
+                        needs=get_route.needs,
+                        max_body_size=get_route.max_body_size,
+                        decompress=get_route.decompress,
+                        max_decompressed_size=get_route.max_decompressed_size,
+                    )
+                )
+                methods.add("HEAD")
+            has_options = "OPTIONS" in methods
+            methods.add("OPTIONS")
+            allow = ", ".join(sorted(methods))
+            if not has_options:
+                automatic.append(
+                    Route(
+                        ("OPTIONS",),
+                        path,
+                        None,
+                        static=StaticResponse(self.app, None, 204, {"Allow": allow}),
+                    )
+                )
+            if path not in skip_405:
+                automatic.append(
+                    Route(
+                        ("*",),
+                        path,
+                        None,
+                        # empty rather than no body, the client gets Content-Length: 0
+                        static=StaticResponse(self.app, b"", 405, {"Allow": allow}),
+                    )
+                )
+        return automatic
+
+    def _get_handle(self, route):
+        key = route.get_key()
+        user_data = self._handles.get(key, None)
+        if user_data is None:
+            handler = route.handler
+            if route.middlewares:
+                handler = middleware(*route.middlewares, handler)
+            user_data = ffi.new_handle(
+                create_dispatcher(self.app, handler, route.create_prelude(self.app, handler))
+            )
+            self._handles[key] = user_data  # Keep alive handler
+        return user_data
+
+    def _register(self, route):
+        app = self.app
+        path = route.path.encode("utf-8")
+        if route.static is not None:
+            # answered entirely by libsocketify when it supports static responses
+            (handler, user_data) = route.static.create(route.head)
+        else:
+            handler = uws_generic_dispatch_handler
+            user_data = self._get_handle(route)
+        if route.host is not None:
+            for method in route.methods:
+                dispatcher = self._hosts.get((method, path), None)
+                if dispatcher is None:
+                    dispatcher = HostDispatcher()
+                    self._hosts[(method, path)] = dispatcher
+                    default = self._globals.get((method, path), None)
+                    if default is not None:
+                        dispatcher.set_default(*default)
+                    native_register[method](
+                        app.SSL,
+                        app.app,
+                        path,
+                        dispatcher.handler,
+                        dispatcher.user_data,
+                    )
+                dispatcher.add(route.host, handler, user_data)
+            return
+
+        for method in route.methods:
+            self._globals[(method, path)] = (handler, user_data)
+            dispatcher = self._hosts.get((method, path), None)
+            if dispatcher is not None:
+                # the host routes are looked up first, this one answers the rest
+                dispatcher.set_default(handler, user_data)
+                continue
+            native_register[method](app.SSL, app.app, path, handler, user_data)
@@ -0,0 +1,92 @@
+import json
+
+
+def is_msgspec(serializer):
+    # msgspec.json exposes encode/decode/Decoder instead of dumps/loads
+    return callable(getattr(serializer, "Decoder", None)) and callable(
+        getattr(serializer, "decode", None)
+    )
+
+
+def load_msgspec():
+    try:
+        import msgspec.json
+
+        return msgspec.json
+    except ImportError:
+        return None
+
+
+class JsonSerializer:
+    # what App.json_serializer() registers, wraps json, orjson, msgspec.json or
+    # anything with dumps/loads so the rest of the code only sees bytes
+    def __init__(self, serializer=json):
+        self.serializer = serializer
+        self.msgspec = is_msgspec(serializer)
+        # schema -> decode(data), built once per schema
+        self._typed = {}
+        if self.msgspec:
+            self._encode = serializer.encode
+            self._loads = serializer.decode
+        else:
+            self._encode = serializer.dumps
+            self._loads = serializer.loads
+        # how a request Body is handed to loads, always without going to str
+        if serializer is json:
+            self._view = None
+        elif self.msgspec or getattr(serializer, "__name__", None) == "orjson":
+            # both read any buffer, orjson rejects bytearray subclasses like Body
+            self._view = memoryview
+        else:
+            self._view = bytes
+
+    def encode(self, value):
+        data = self._encode(value)
+        if isinstance(data, str):
+            return data.encode("utf-8")
+        return bytes(data)
+
+    def dumps(self, value):
+        data = self._encode(value)
+        if isinstance(data, str):
+            return data
+        return bytes(data).decode("utf-8")
+
+    def loads(self, data):
+        if self._view is not None and isinstance(data, bytearray):
+            data = self._view(data)
+        return self._loads(data)
+
+    def decode(self, data, schema=None):
+        if schema is None:
+            return self.loads(data)
+        decode = self._typed.get(schema, None)
+        if decode is None:
+            decode = self._create_typed(schema)
+            self._typed[schema] = decode
+        return decode(data)
+
+    def _create_typed(self, schema):
+        # pydantic models parse and validate the raw bytes themselves
+        validate_json = getattr(schema, "model_validate_json", None)
+        if validate_json is not None:
+            return validate_json
+        # msgspec validates while decoding, used even when it is not the
+        # registered serializer as long as it is installed
+        msgspec_json = self.serializer if self.msgspec else load_msgspec()
+        if msgspec_json is not None:
+            try:
+                decode = msgspec_json.Decoder(schema).decode
+            except TypeError:  # not a type msgspec understands
+                pass
+            else:
+                return lambda data: decode(
+                    memoryview(data) if isinstance(data, bytearray) else data
+                )
+        if callable(schema):
+            loads = self.loads
+            return lambda data: schema(loads(data))
+        raise RuntimeError('"%r" is not a supported json schema' % (schema,))
+
+    def __repr__(self):
+        return "JsonSerializer(%r)" % (self.serializer,)
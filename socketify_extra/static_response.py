@@ -0,0 +1,136 @@
+from .uws import ffi, lib, has_native
+from .response import encode_status
+from .datastructures import pack_headers
+from .uwebsocket_cffi import uws_generic_dispatch_handler
+
+
+native_static = has_native("socketify_create_static_response")
+
+
+def encode_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    return str(value).encode("utf-8")
+
+
+class StaticResponse:
+    # status, headers and body are encoded once. libsocketify builds exporting
+    # socketify_create_static_response answer in C++ without calling into
+    # Python, the binaries shipped today do not and run _dispatcher instead
+    def __init__(self, app, body, status=200, headers=None):
+        self.app = app
+        self.status = encode_status(status)
+        self.code = status if isinstance(status, int) else None
+
+        content_type = None
+        if body is None:
+            self.body = None
+        elif isinstance(body, bytes):
+            self.body = body
+        elif isinstance(body, str):
+            self.body = body.encode("utf-8")
+            content_type = b"text/plain; charset=utf-8"
+        else:
+            self.body = app._json_serializer.encode(body)
+            content_type = b"application/json"
+
+        if headers is None:
+            headers = ()
+        elif isinstance(headers, dict):
+            headers = headers.items()
+
+        self.headers = []
+        for name, value in headers:
+            name = encode_bytes(name)
+            if name.lower() == b"content-type":
+                content_type = None
+            self.headers.append((name, encode_bytes(value)))
+        if content_type is not None:
+            self.headers.append((b"Content-Type", content_type))
+
+        # head -> native response, HEAD variants keep Content-Length but skip the body
+        self._native = {}
+        # head -> (socketify_header list, buffer) used by _dispatcher
+        self._packed = {}
+
+    def create(self, head=False):
+        # (uWS handler, user_data) to register the route with
+        native = self._native.get(head, None)
+        if native is not None:
+            return native
+        if not native_static:
+            native = (uws_generic_dispatch_handler, ffi.new_handle(self._dispatcher(head)))
+            self._native[head] = native
+            return native
+
+        # native copies everything, these buffers only need to live during the call
+        header_list = ffi.NULL
+        keep_alive = []
+        for name, value in reversed(self.headers):
+            header = ffi.new("socketify_header*")
+            name_data = ffi.new("char[]", name)
+            value_data = ffi.new("char[]", value)
+            header.name = name_data
+            header.name_size = len(name)
+            header.value = value_data
+            header.value_size = len(value)
+            header.next = header_list
+            keep_alive.append((header, name_data, value_data))
+            header_list = header
+
+        body = self.body
+        native = lib.socketify_create_static_response(
+            self.app.SSL,
+            self.status,
+            len(self.status),
+            header_list,
+            ffi.NULL if body is None else body,
+            0 if body is None else len(body),
+            body is not None,
+            head,
+        )
+        native = (lib.socketify_static_response_handler, native)
+        self._native[head] = native
+        return native
+
+    def _dispatcher(self, head):
+        # same answer from Python when libsocketify lacks static responses, the
+        # headers are packed once so each request makes two or three calls
+        app = self.app
+        status = self.status
+        code = self.code
+        headers = list(self.headers)
+        body = self.body
+        if head and body is not None:
+            # uWS only adds Content-Length itself when it sends the body
+            headers.append((b"Content-Length", b"%d" % len(body)))
+        header_list = ffi.NULL
+        if headers:
+            # kept with the buffer it points into for as long as the route lives
+            self._packed[head] = pack_headers(headers)
+            header_list = self._packed[head][0]
+
+        def dispatch(res, req):
+            ssl = app.SSL
+            if code is not None:
+                lib.socketify_res_write_int_status_with_headers(ssl, res, code, header_list)
+            else:
+                lib.uws_res_write_status(ssl, res, status, len(status))
+                lib.socketify_res_write_headers(ssl, res, header_list)
+            if body is None or head:
+                lib.uws_res_end_without_body(ssl, res, 0)
+            else:
+                lib.uws_res_end(ssl, res, body, len(body), 0)
+
+        return dispatch
+
+    def __del__(self):
+        try:
+            if native_static:
+                for (_, native) in self._native.values():
+                    lib.socketify_destroy_static_response(native)
+            self._native = {}
+        except Exception:
+            pass
@@ -0,0 +1,105 @@
+from collections import deque
+
+from .uws import ffi
+
+
+class Body(bytearray):
+    # what get_data() resolves to, getvalue() keeps BytesIO style callers working
+    def getvalue(self):
+        return bytes(self)
+
+
+class BodyReader:
+    # copies every native chunk once into a single Body, bytearray growth is
+    # amortized and measured faster than a zero filled Content-Length buffer
+    __slots__ = ("future", "body")
+
+    def __init__(self, future):
+        self.future = future
+        self.body = Body()
+
+    def write(self, chunk, length):
+        self.body += ffi.buffer(chunk, length)
+
+    def __call__(self, response, chunk, is_end):
+        # bytes chunks from trigger_data_handler, the native path uses write()
+        if chunk:
+            self.body += chunk
+        if is_end:
+            self.end()
+
+    def end(self):
+        future = self.future
+        if not future.done():
+            future.set_result(self.body)
+
+
+class BodyStream:
+    # yields request body chunks as uWS delivers them, reading from the socket
+    # is paused while more than high_water_mark bytes wait for the consumer
+    def __init__(self, response, high_water_mark=1024 * 1024, low_water_mark=None):
+        if high_water_mark <= 0:
+            raise RuntimeError("high_water_mark must be greater than 0")
+        self.response = response
+        self.high_water_mark = high_water_mark
+        self.low_water_mark = (
+            high_water_mark // 2 if low_water_mark is None else low_water_mark
+        )
+        self.buffered = 0
+        self.ended = False
+        self.aborted = False
+        self.paused = False
+        self._chunks = deque()
+        self._waiter = None
+
+        response.on_aborted(self._on_aborted)
+        response.on_data(self._on_data)
+
+    def _wake(self):
+        waiter = self._waiter
+        if waiter is not None:
+            self._waiter = None
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _on_data(self, response, chunk, is_end):
+        if chunk:
+            self._chunks.append(chunk)
+            self.buffered += len(chunk)
+        if is_end:
+            self.ended = True
+        elif not self.paused and self.buffered >= self.high_water_mark:
+            # consumer is behind, stop reading from the socket until it catches up
+            self.paused = True
+            response.pause()
+        self._wake()
+
+    def _on_aborted(self, response):
+        response.aborted = True
+        self.aborted = True
+        self._wake()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        chunks = self._chunks
+        while not chunks:
+            if self.ended:
+                raise StopAsyncIteration
+            if self.aborted:
+                raise RuntimeError("Request aborted before the body was received")
+            self._waiter = self.response.app.loop.create_future()
+            await self._waiter
+
+        chunk = chunks.popleft()
+        self.buffered -= len(chunk)
+        if self.paused and self.buffered <= self.low_water_mark:
+            self.paused = False
+            if not self.response.aborted:
+                self.response.resume()
+        return chunk
+
+    async def read(self):
+        # whole remaining body, for small payloads mixed with streaming code
+        return b"".join([chunk async for chunk in self])
@@ -1,25 +1,28 @@
-from socketify_extra import Socketify
+from socketify_extra import Socketify, HeaderSet
 
 
 router = Socketify()
 
-
-def http_options(res, req):
+# encoded once, every response only appends the compiled block
+cors_headers = HeaderSet.compile({
     # change "*" To CORS example "http://localhost:3000, http://example.domain.com"
-    res.write_header("Access-Contoll-Allow-Origin", "*")
+    "Access-Control-Allow-Origin": "*",
     # change your method cors example "GET, POST"
-    res.write_header("Access-Controll-Allow-Method", "GET, POST, OPTIONS, DELETE, PUT, PATCH")
-    res.write_header("Access-Controll-Allow-Headers", "content-Type")
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS, DELETE, PUT, PATCH",
+    "Access-Control-Allow-Headers": "content-Type",
+})
+
+
+def http_options(res, req):
+    res.write_headers(cors_headers)
     res.end("")
 
 
 def http_handle(res, req):
     if req.get_method() == "OPTIONS":
         http_options(res, req)
-    else:
-        res.write_header("Access-Contoll-Allow-Origin", "*")  # edit your cors "http://localhost:3000, http://example.domain.com"
-    res.write_header("Access-Controll-Allow-Method", "GET, POST, OPTIONS, DELETE, PUT, PATCH")
-    res.write_header("Access-Controll-Allow-Headers", "content-Type")
+        return
+    res.write_headers(cors_headers)
     res.end("Hello from Socketify CORS Enable")
 
 
@@ -0,0 +1,264 @@
+import re
+import uuid
+import inspect
+from collections import OrderedDict
+
+from .helpers import middleware
+
+
+segment_matchers = {
+    "str": (re.compile(r"[^/]+"), str),
+    "int": (re.compile(r"-?[0-9]+"), int),
+    "float": (re.compile(r"-?[0-9]+(\.[0-9]+)?"), float),
+    "uuid": (
+        re.compile(
+            r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+        ),
+        uuid.UUID,
+    ),
+}
+
+
+class TrieRoute:
+    __slots__ = ("methods", "pattern", "handler", "is_async")
+
+    def __init__(self, methods, pattern, handler):
+        self.methods = methods
+        self.pattern = pattern
+        self.handler = handler
+        self.is_async = inspect.iscoroutinefunction(handler)
+
+    def __repr__(self):
+        return "TrieRoute(%s %s)" % ("|".join(self.methods), self.pattern)
+
+
+class TrieNode:
+    __slots__ = ("static", "params", "catch_all", "routes")
+
+    def __init__(self):
+        # segment -> TrieNode
+        self.static = {}
+        # (name, regex, converter, TrieNode) tried in registration order
+        self.params = []
+        # (name, method -> TrieRoute) for a trailing {name:path}
+        self.catch_all = None
+        # method -> TrieRoute
+        self.routes = {}
+
+
+def parse_segment(segment):
+    # returns (name, kind, expression) for {name}, {name:kind} and {name:regex}
+    if not (segment.startswith("{") and segment.endswith("}")):
+        return None
+    name, _, expression = segment[1:-1].partition(":")
+    if not name:
+        raise RuntimeError('"%s" is missing a parameter name' % segment)
+    if not expression:
+        return (name, "str", None)
+    if expression == "path" or expression in segment_matchers:
+        return (name, expression, None)
+    return (name, "regex", expression)
+
+
+class TrieRouter:
+    # Routes with typed, regex and path segments matched in Python behind a single
+    # App.any route, uWS only sees the prefix
+    def __init__(self, app, prefix: str = "", *middlewares, cache_size=1024):
+        self.app = app
+        if len(middlewares) == 1 and isinstance(middlewares[0], (list, tuple)):
+            middlewares = middlewares[0]
+        self.middlewares = list(middlewares)
+        self.prefix = prefix.rstrip("/")
+        self.root = TrieNode()
+        self.routes = []
+        self.cache_size = cache_size
+        # (method, url) -> match, repeated urls skip the trie walk entirely
+        self._cache = OrderedDict()
+        self._registered = False
+
+    def add_route(self, path, handler, methods=("GET",), middlewares=()):
+        # cache, needs and the other route options are set per uWS route, trie
+        # routes share one App.any so only middlewares apply
+        methods = tuple(method.upper() for method in methods)
+        middlewares = (*self.middlewares, *middlewares)
+        if middlewares:
+            handler = middleware(*middlewares, handler)
+        route = TrieRoute(methods, path, handler)
+
+        node = self.root
+        segments = [segment for segment in path.split("/") if segment]
+        for index, segment in enumerate(segments):
+            parsed = parse_segment(segment)
+            if parsed is None:
+                node = node.static.setdefault(segment, TrieNode())
+                continue
+            (name, kind, expression) = parsed
+            if kind == "path":
+                if index != len(segments) - 1:
+                    raise RuntimeError('"%s" must be the last segment' % segment)
+                if node.catch_all is None:
+                    node.catch_all = (name, {})
+                elif node.catch_all[0] != name:
+                    raise RuntimeError('"%s" conflicts with another path segment' % segment)
+                for method in methods:
+                    node.catch_all[1][method] = route
+                break
+            if kind == "regex":
+                try:
+                    regex = re.compile(expression)
+                except re.error as err:
+                    raise RuntimeError('"%s" is not a valid regex: %s' % (segment, err))
+                converter = str
+            else:
+                (regex, converter) = segment_matchers[kind]
+
+            for param in node.params:
+                if param[0] == name and param[1].pattern == regex.pattern:
+                    node = param[3]
+                    break
+            else:
+                child = TrieNode()
+                node.params.append((name, regex, converter, child))
+                node = child
+        else:
+            for method in methods:
+                node.routes[method] = route
+
+        self.routes.append(route)
+        self._cache.clear()
+        self._register()
+        return route
+
+    def _register(self):
+        if self._registered:
+            return
+        self._registered = True
+        if self.prefix:
+            self.app.any(self.prefix, self._dispatch)
+        self.app.any("%s/*" % self.prefix, self._dispatch)
+
+    def match(self, method, url):
+        key = (method, url)
+        cache = self._cache
+        result = cache.get(key, False)
+        if result is not False:
+            cache.move_to_end(key)
+            return result
+
+        path = url[len(self.prefix) :] if self.prefix else url
+        segments = [segment for segment in path.split("/") if segment]
+        result = self._walk(self.root, segments, 0, method, [])
+        if result is not None:
+            (route, params) = result
+            result = (route, tuple(params))
+
+        cache[key] = result
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return result
+
+    def _walk(self, node, segments, index, method, params):
+        if index == len(segments):
+            route = node.routes.get(method, None) or node.routes.get("*", None)
+            if route is not None:
+                return (route, params)
+        else:
+            segment = segments[index]
+            child = node.static.get(segment, None)
+            if child is not None:
+                result = self._walk(child, segments, index + 1, method, params)
+                if result is not None:
+                    return result
+            for name, regex, converter, child in node.params:
+                if regex.fullmatch(segment) is None:
+                    continue
+                try:
+                    value = converter(segment)
+                except ValueError:
+                    continue
+                result = self._walk(
+                    child, segments, index + 1, method, params + [(name, segment, value)]
+                )
+                if result is not None:
+                    return result
+
+        if node.catch_all is not None:
+            (name, routes) = node.catch_all
+            route = routes.get(method, None) or routes.get("*", None)
+            if route is not None:
+                rest = "/".join(segments[index:])
+                return (route, params + [(name, rest, rest)])
+        return None
+
+    def _dispatch(self, res, req):
+        method = req.get_method()
+        result = self.match(method.upper() if method else "", req.get_url())
+        if result is None:
+            # not ours, let uWS try the next route
+            req.set_yield(True)
+            return
+
+        (route, params) = result
+        req._params = [raw for (_, raw, _) in params]
+        req._named_params = {name: value for (name, _, value) in params}
+        if route.is_async:
+            res.grab_aborted_handler()
+            res.run_async(route.handler(res, req))
+        else:
+            route.handler(res, req)
+
+    def get(self, path, middlewares=()):
+        def decorator(handler):
+            self.add_route(path, handler, ("GET",), middlewares)
+            return handler
+
+        return decorator
+
+    def post(self, path, middlewares=()):
+        def decorator(handler):
+            self.add_route(path, handler, ("POST",), middlewares)
+            return handler
+
+        return decorator
+
+    def options(self, path, middlewares=()):
+        def decorator(handler):
+            self.add_route(path, handler, ("OPTIONS",), middlewares)
+            return handler
+
+        return decorator
+
+    def delete(self, path, middlewares=()):
+        def decorator(handler):
+            self.add_route(path, handler, ("DELETE",), middlewares)
+            return handler
+
+        return decorator
+
+    def patch(self, path, middlewares=()):
+        def decorator(handler):
+            self.add_route(path, handler, ("PATCH",), middlewares)
+            return handler
+
+        return decorator
+
+    def put(self, path, middlewares=()):
+        def decorator(handler):
+            self.add_route(path, handler, ("PUT",), middlewares)
+            return handler
+
+        return decorator
+
+    def head(self, path, middlewares=()):
+        def decorator(handler):
+            self.add_route(path, handler, ("HEAD",), middlewares)
+            return handler
+
+        return decorator
+
+    def any(self, path, middlewares=()):
+        def decorator(handler):
+            self.add_route(path, handler, ("*",), middlewares)
+            return handler
+
+        return decorator
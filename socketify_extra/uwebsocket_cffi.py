@@ -777,41 +777,6 @@ def uws_websocket_close_handler(ws, code, message, length, user_data):
             )  # just log in console the error to call attention
 
 
-@ffi.callback("void(uws_res_t*, uws_req_t*, void*)")
-def uws_generic_factory_method_handler(res, req, user_data):
-    if user_data != ffi.NULL:
-        (handler, app) = ffi.from_handle(user_data)
-        app.loop.is_idle = False
-        instances = app._factory.get(app, res, req)
-        (response, request, dispose) = instances
-        try:
-            if inspect.iscoroutinefunction(handler):
-                response.grab_aborted_handler()
-                if dispose:
-
-                    async def wrapper(app, instances, handler, response, request):
-                        try:
-                            await handler(response, request)
-                        finally:
-                            app._factory.dispose(instances)
-
-                    response.run_async(
-                        wrapper(app, instances, handler, response, request)
-                    )
-                else:
-                    response.run_async(handler(response, request))
-            else:
-                handler(response, request)
-                if dispose:
-                    app._factory.dispose(instances)
-
-        except Exception as err:
-            response.grab_aborted_handler()
-            app.trigger_error(err, response, request)
-            if dispose:
-                app._factory.dispose(instances)
-
-
 @ffi.callback("void(uws_res_t*, uws_req_t*, uws_socket_context_t*, void*)")
 def uws_websocket_factory_upgrade_handler(res, req, context, user_data):
     if user_data != ffi.NULL:
@@ -860,7 +825,7 @@ def uws_websocket_upgrade_handler_with_extension(res, req, context, user_data):
         app._response_extension.set_properties(response)
         # bind methods to response
         app._response_extension.bind_methods(response)
-        request = AppRequest(req, app)
+        request = AppRequest(req, app, res)
         # set default value in properties
         app._request_extension.set_properties(request)
         # bind methods to request
@@ -884,7 +849,7 @@ def uws_websocket_upgrade_handler(res, req, context, user_data):
         handlers, app = ffi.from_handle(user_data)
         app.loop.is_idle = False
         response = AppResponse(res, app)
-        request = AppRequest(req, app)
+        request = AppRequest(req, app, res)
         try:
             handler = handlers.upgrade
             if inspect.iscoroutinefunction(handler):
@@ -899,49 +864,10 @@ def uws_websocket_upgrade_handler(res, req, context, user_data):
 
 
 @ffi.callback("void(uws_res_t*, uws_req_t*, void*)")
-def uws_generic_method_handler_with_extension(res, req, user_data):
+def uws_generic_dispatch_handler(res, req, user_data):
     if user_data != ffi.NULL:
-        (handler, app) = ffi.from_handle(user_data)
-        app.loop.is_idle = False
-        response = AppResponse(res, app)
-        # set default value in properties
-        app._response_extension.set_properties(response)
-        # bind methods to response
-        app._response_extension.bind_methods(response)
-        request = AppRequest(req, app)
-        # set default value in properties
-        app._request_extension.set_properties(request)
-        # bind methods to request
-        app._request_extension.bind_methods(request)
-
-        try:
-            if inspect.iscoroutinefunction(handler):
-                response.grab_aborted_handler()
-                response.run_async(handler(response, request))
-            else:
-                handler(response, request)
-        except Exception as err:
-            response.grab_aborted_handler()
-            app.trigger_error(err, response, request)
-
-
-@ffi.callback("void(uws_res_t*, uws_req_t*, void*)")
-def uws_generic_method_handler(res, req, user_data):
-    if user_data != ffi.NULL:
-        (handler, app) = ffi.from_handle(user_data)
-        app.loop.is_idle = False
-        response = AppResponse(res, app)
-        request = AppRequest(req, app)
-
-        try:
-            if inspect.iscoroutinefunction(handler):
-                response.grab_aborted_handler()
-                response.run_async(handler(response, request))
-            else:
-                handler(response, request)
-        except Exception as err:
-            response.grab_aborted_handler()
-            app.trigger_error(err, response, request)
+        # user_data is the dispatcher specialized for this route at registration
+        ffi.from_handle(user_data)(res, req)
 
 
 @ffi.callback("void(struct us_listen_socket_t*, const char*, size_t,int, void*)")
@@ -365,11 +365,36 @@ typedef struct {
   void * user_data;
 } socketify_asgi_ws_app_info;
 
+socketify_asgi_data socketify_asgi_request(int ssl, uws_req_t *req, uws_res_t *res);
 void socketify_destroy_headers(socketify_header* headers);
 bool socketify_res_write_int_status_with_headers(int ssl, uws_res_t* res, int code, socketify_header* headers);
 void socketify_res_write_headers(int ssl, uws_res_t* res, socketify_header* headers);
 
 bool socketify_res_write_int_status(int ssl, uws_res_t* res, int code);
+void socketify_res_end_without_body_with_length(int ssl, uws_res_t* res, size_t length, bool close_connection);
+void socketify_res_on_data_with_limit(int ssl, uws_res_t *res, void (*handler)(uws_res_t *res, const char *chunk, size_t chunk_length, bool is_end, void *user_data), void (*on_limit)(uws_res_t *res, void *user_data), size_t limit, void *user_data);
+
+typedef struct {
+  int ssl;
+  const char* status;
+  size_t status_size;
+  socketify_header* header_list;
+  const char* body;
+  size_t body_size;
+  bool has_body;
+  bool head;
+} socketify_static_response;
+socketify_static_response* socketify_create_static_response(int ssl, const char* status, size_t status_size, socketify_header* headers, const char* body, size_t body_size, bool has_body, bool head);
+void socketify_static_response_handler(uws_res_t *res, uws_req_t *req, void *user_data);
+void socketify_destroy_static_response(socketify_static_response* response);
+
+typedef struct socketify_host_router socketify_host_router;
+socketify_host_router* socketify_create_host_router();
+void socketify_host_router_add(socketify_host_router* router, const char* host, size_t host_size, uws_method_handler handler, void* user_data);
+void socketify_host_router_handler(uws_res_t *res, uws_req_t *req, void *user_data);
+void socketify_host_router_set_default(socketify_host_router* router, uws_method_handler handler, void* user_data);
+void socketify_destroy_host_router(socketify_host_router* router);
+void socketify_req_get_parameters(uws_req_t *req, const char **values, size_t *values_sizes, size_t count);
 
 
 void socketify_res_cork_write(int ssl, uws_res_t *response, const char* data, size_t length);
@@ -399,4 +424,13 @@ library_path_socketify = os.path.join(
         library_extension,
     ),
 )
-lib = ffi.dlopen(library_path_socketify)
\ No newline at end of file
+lib = ffi.dlopen(library_path_socketify)
+
+def has_native(name):
+    # the shipped libsocketify binaries can be older than these sources, newer
+    # exports are checked once at import and fall back to the uws_* C API
+    try:
+        getattr(lib, name)
+    except AttributeError:
+        return False
+    return True
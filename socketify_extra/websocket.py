@@ -165,7 +165,7 @@ class WebSocket:
                 lib.uws_ws_send_fragment(self.app.SSL, self.ws, b"", 0, compress)
                 return self
             else:
-                data = self.app._json_serializer.dumps(message).encode("utf-8")
+                data = self.app._json_serializer.encode(message)
 
             return SendStatus(
                 lib.uws_ws_send_fragment(
@@ -186,7 +186,7 @@ class WebSocket:
                 lib.uws_ws_send_last_fragment(self.app.SSL, self.ws, b"", 0, compress)
                 return self
             else:
-                data = self.app._json_serializer.dumps(message).encode("utf-8")
+                data = self.app._json_serializer.encode(message)
 
             return SendStatus(
                 lib.uws_ws_send_last_fragment(
@@ -209,7 +209,7 @@ class WebSocket:
                 )
                 return self
             else:
-                data = self.app._json_serializer.dumps(message).encode("utf-8")
+                data = self.app._json_serializer.encode(message)
 
             return SendStatus(
                 lib.uws_ws_send_first_fragment_with_opcode(
@@ -236,7 +236,7 @@ class WebSocket:
                 )
                 return self
             else:
-                data = self.app._json_serializer.dumps(message).encode("utf-8")
+                data = self.app._json_serializer.encode(message)
 
             return SendStatus(
                 lib.uws_ws_send_with_options(
@@ -263,7 +263,7 @@ class WebSocket:
                 lib.uws_ws_end(self.app.SSL, self.ws, b"", 0)
                 return self
             else:
-                data = self.app._json_serializer.dumps(message).encode("utf-8")
+                data = self.app._json_serializer.encode(message)
 
             lib.uws_ws_end(self.app.SSL, self.ws, code, data, len(data))
         finally:
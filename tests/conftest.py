@@ -0,0 +1,67 @@
+import os
+import sys
+import socket
+import subprocess
+import http.client
+
+import pytest
+
+# example scripts that start a server when imported
+collect_ignore = ["test_cors.py"]
+
+tests_path = os.path.dirname(os.path.abspath(__file__))
+root_path = os.path.dirname(tests_path)
+sys.path.insert(0, root_path)
+
+
+class LiveServer:
+    # tests/live_app.py running in its own process on the committed libsocketify
+    def __init__(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        env = dict(os.environ, PYTHONPATH=root_path)
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.join(tests_path, "live_app.py"), str(self.port)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env=env,
+        )
+        line = self.process.stdout.readline()
+        if not line.startswith(b"ready"):
+            self.process.kill()
+            raise RuntimeError("live_app.py did not start: %r" % line)
+
+    def request(self, method, path, body=None, headers=None, host=None):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        try:
+            if host is not None:
+                connection.putrequest(method, path, skip_host=True)
+                connection.putheader("Host", host)
+                for name, value in (headers or {}).items():
+                    connection.putheader(name, value)
+                connection.endheaders(body)
+            else:
+                try:
+                    connection.request(method, path, body, headers or {})
+                except (BrokenPipeError, ConnectionResetError):
+                    # answered (413) and closed before the whole body was sent
+                    pass
+            response = connection.getresponse()
+            return (response.status, response.getheaders(), response.read())
+        finally:
+            connection.close()
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def close(self):
+        self.process.kill()
+        self.process.wait()
+
+
+@pytest.fixture(scope="module")
+def server():
+    live = LiveServer()
+    yield live
+    live.close()
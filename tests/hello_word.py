@@ -4,7 +4,7 @@ app = Socketify()
 
 async def hello(res, req):
     res.write_header("Server", "myserver")
-    res.get_json()
+    await res.get_json()
     res.end("hello word")
     
 
@@ -0,0 +1,97 @@
+# the app served by the live tests, python tests/live_app.py PORT
+import sys
+import asyncio
+
+from socketify_extra import Socketify, MiddlewareRouter, HeaderSet
+from socketify_extra.dataclasses import CachePolicy
+
+app = Socketify(auto_methods=True)
+
+
+def headers(res, req):
+    res.end(req.get_headers().get("x-test", "none"))
+
+
+async def preserve(res, req):
+    req.preserve()
+    await asyncio.sleep(0)
+    res.cork_send("%s %s %s" % (req.get_method(), req.get_url(), req.get_header("x-test")))
+
+
+def middleware(res, req, data=None):
+    return {"user": "test"}
+
+
+async def after_middleware(res, req, data=None):
+    await asyncio.sleep(0)
+    res.cork_send("%s %s" % (data["user"], req.get_header("x-test")))
+
+
+async def body(res, req):
+    try:
+        data = await res.get_data()
+    except RuntimeError:
+        return
+    res.cork_send(b"%d" % len(data.getvalue()))
+
+
+async def cork_status(res, req):
+    await asyncio.sleep(0)
+    res.write_status(201).cork_send({"ok": True})
+
+
+cached_runs = [0]
+
+
+async def cached(res, req):
+    cached_runs[0] += 1
+    await asyncio.sleep(0.2)
+    res.cork_send(b"run %d" % cached_runs[0])
+
+
+many_headers = [("X-Header-%d" % index, str(index)) for index in range(20)]
+
+
+def write_headers(res, req):
+    res.write_status(201).write_header("X-First", "1")
+    res.set_cookie("session", "a b", {"path": "/"})
+    res.send("created", headers=many_headers)
+
+
+def status_with_headers(res, req):
+    res.write_status(202)
+    res.send("accepted", headers=many_headers)
+
+
+security_headers = HeaderSet.compile(
+    {"X-Frame-Options": "DENY", "X-Content-Type-Options": "nosniff"}
+)
+
+
+def header_set(res, req):
+    res.write_status(203).write_headers(security_headers, {"X-Extra": 1}).end("set")
+
+
+app.get("/headers", headers)
+app.get("/header-set", header_set)
+app.get("/write-headers", write_headers)
+app.get("/status-with-headers", status_with_headers)
+app.get("/preserve", preserve)
+app.get("/cork-status", cork_status)
+MiddlewareRouter(app, middleware).get("/middleware", after_middleware)
+app.post("/body", body, max_body_size=1000)
+app.get("/cached", cached, cache=CachePolicy(ttl=60))
+app.get(
+    "/users/:id/posts/:slug",
+    lambda res, req: res.send(req.get_named_parameters()),
+    converters={"id": int},
+)
+app.get("/files/:name/*", lambda res, req: res.end(req.get_parameters()[0]))
+app.static_response("/static", "ok", headers={"X-Static": "1"}, methods=("GET", "HEAD"))
+app.static_response("/static-text", b"", status="299 Custom", headers={"X-Static": "2"})
+app.host("api.example.com").get("/host", lambda res, req: res.end("api"))
+app.get("/host", lambda res, req: res.end("global"))
+app.host("api.example.com").get("/host-only", lambda res, req: res.end("api"))
+
+app.listen(int(sys.argv[1]), lambda config: print("ready", flush=True))
+app.run()
@@ -0,0 +1,61 @@
+import gzip
+import zlib
+
+import pytest
+
+from socketify_extra.content_encoding import BodyDecoder
+
+
+DATA = b"socketify " * 1000
+
+
+def decode(decoder, data, chunk_size):
+    output = []
+    for offset in range(0, len(data), chunk_size):
+        chunk = data[offset : offset + chunk_size]
+        output.append(decoder.decompress(chunk, offset + chunk_size >= len(data)))
+    return b"".join(output)
+
+
+@pytest.mark.parametrize(
+    "encoding, data",
+    [
+        ("gzip", gzip.compress(DATA)),
+        ("deflate", zlib.compress(DATA)),
+        # raw deflate without the zlib header
+        ("deflate", zlib.compress(DATA, wbits=-zlib.MAX_WBITS)),
+        ("gzip", gzip.compress(DATA[:5000]) + gzip.compress(DATA[5000:])),
+    ],
+)
+def test_decode(encoding, data):
+    for chunk_size in (7, len(data)):
+        decoder = BodyDecoder.create(encoding, len(DATA))
+        assert decode(decoder, data, chunk_size) == DATA
+        assert decoder.size == len(DATA)
+
+
+def test_stacked_encodings():
+    data = gzip.compress(zlib.compress(DATA))
+    decoder = BodyDecoder.create("deflate, gzip", len(DATA))
+    assert decode(decoder, data, 100) == DATA
+
+
+def test_identity_and_unsupported():
+    assert BodyDecoder.create("identity", 10) is None
+    assert BodyDecoder.create("", 10) is None
+    with pytest.raises(RuntimeError):
+        BodyDecoder.create("compress", 10)
+
+
+def test_max_size():
+    decoder = BodyDecoder.create("gzip", len(DATA) - 1)
+    with pytest.raises(RuntimeError):
+        decode(decoder, gzip.compress(DATA), 64)
+    assert decoder.too_large
+
+
+def test_truncated_stream():
+    decoder = BodyDecoder.create("gzip", len(DATA))
+    data = gzip.compress(DATA)
+    with pytest.raises(RuntimeError):
+        decoder.decompress(data[: len(data) // 2], True)
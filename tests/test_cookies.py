@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import pytest
+
+from socketify_extra.cookies import (
+    CookieSigner, parse_cookie, parse_cookies, serialize_cookie,
+)
+
+
+def test_parse_cookies():
+    header = 'session=abc; theme="dark \\"blue\\""; session=second; flag'
+    assert parse_cookies(header) == {"session": "abc", "theme": 'dark "blue"'}
+    assert parse_cookie(header, "theme") == 'dark "blue"'
+    assert parse_cookie(header, "missing") is None
+    assert parse_cookies("") == {}
+    assert parse_cookie(None, "session") is None
+
+
+def test_serialize_cookie():
+    cookie = serialize_cookie(
+        "session",
+        "abc",
+        {
+            "path": "/",
+            "max_age": 60,
+            "httponly": True,
+            "secure": False,
+            "samesite": "Lax",
+            "expires": datetime(2030, 1, 2, 3, 4, 5),
+        },
+    )
+    assert cookie == (
+        b"session=abc; Path=/; Max-Age=60; HttpOnly; SameSite=Lax; "
+        b"Expires=Wed, 02 Jan 2030 03:04:05 GMT"
+    )
+    with pytest.raises(RuntimeError):
+        serialize_cookie("bad name", "a")
+    with pytest.raises(RuntimeError):
+        serialize_cookie("session", "a", {"unknown": 1})
+    with pytest.raises(RuntimeError):
+        serialize_cookie("session", "a\r\nX-Injected: 1")
+
+
+def test_signer():
+    signer = CookieSigner("secret")
+    signed = signer.sign("session", "user 1")
+    assert signed.startswith("user+1.")
+    assert signer.unsign("session", signed) == "user 1"
+    # served from the verified cache the second time
+    assert signer.unsign("session", signed) == "user 1"
+    assert signer.unsign("other", signed) is None
+    assert signer.unsign("session", signed[:-1] + "A") is None
+    assert signer.unsign("session", "unsigned") is None
+    assert CookieSigner("another").unsign("session", signed) is None
+    with pytest.raises(RuntimeError):
+        CookieSigner("")
+
+
+def test_signer_cache_size():
+    signer = CookieSigner("secret", cache_size=2)
+    for value in ("a", "b", "c"):
+        signer.unsign("session", signer.sign("session", value))
+    assert len(signer._verified) == 2
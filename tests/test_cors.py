@@ -3,8 +3,8 @@ import re
 
 app = Socketify()
 
-def home(res, req):
-    res.get_json()
+async def home(res, req):
+    await res.get_json()
     res.end("hello word")
 
 def cors_middleware(res: Response, req:Request, data=None):
@@ -0,0 +1,56 @@
+import pytest
+
+from socketify_extra.datastructures import QueryParams, FormData
+from socketify_extra.forms import parse_urlencoded, FormParser
+
+
+def test_query_params():
+    query = QueryParams("a=1&b=x+y&a=2&c=&%C3%A9=%C3%A9&&d=3.5")
+    assert query["a"] == ["1", "2"]
+    assert query.get_first("a") == "1"
+    assert query.get_last("a") == "2"
+    assert query["b"] == ["x y"]
+    assert query["é"] == ["é"]
+    # blank values are dropped like parse_qs does
+    assert "c" not in query
+    assert query.get("c") is None
+    assert query.get_list("missing") == []
+    assert query.get_int("a") == 1
+    assert query.get_int("b") is None
+    assert query.get_float("d") == 3.5
+    assert sorted(query) == ["a", "b", "d", "é"]
+    assert len(QueryParams("")) == 0
+
+
+def test_parse_urlencoded():
+    form = parse_urlencoded(b"name=a+b&tag=1&tag=2&empty=&%C3%A9=%C3%A9")
+    assert isinstance(form, FormData)
+    assert form["name"] == "a b"
+    assert form["tag"] == "2"
+    assert form.get_first("tag") == "1"
+    assert form.get_list("tag") == ["1", "2"]
+    assert form["empty"] == ""
+    assert form["é"] == "é"
+    assert form.multi_items()[:2] == [("name", "a b"), ("tag", "1")]
+    with pytest.raises(RuntimeError):
+        parse_urlencoded(b"a=1&b=2&c=3", max_fields=2)
+
+
+def test_form_parser_chunks():
+    data = b"first=a%20b&second=%C3%A9t%C3%A9&third=3"
+    for chunk_size in (1, 4, len(data)):
+        parser = FormParser()
+        items = []
+        for offset in range(0, len(data), chunk_size):
+            items += parser.feed(data[offset : offset + chunk_size])
+        items += parser.close()
+        assert items == [("first", "a b"), ("second", "été"), ("third", "3")]
+
+
+def test_form_parser_limits():
+    parser = FormParser(max_fields=2)
+    with pytest.raises(RuntimeError):
+        parser.feed(b"a=1&b=2&c=3&")
+    parser = FormParser(max_field_size=8)
+    with pytest.raises(RuntimeError):
+        parser.feed(b"a=" + b"x" * 16)
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from socketify_extra.multipart import (
+    MultipartParser, MultipartReader, FormField, UploadFile, get_boundary,
+    parse_options_header,
+)
+
+
+BOUNDARY = "----boundary"
+BODY = (
+    b"preamble\r\n"
+    b"------boundary\r\n"
+    b'Content-Disposition: form-data; name="title"\r\n'
+    b"\r\n"
+    b"hello\r\n"
+    b"------boundary\r\n"
+    b'Content-Disposition: form-data; name="file"; filename="a.txt"\r\n'
+    b"Content-Type: text/plain\r\n"
+    b"\r\n"
+    b"line 1\r\nline 2\r\n"
+    b"------boundary--\r\n"
+)
+
+
+def parse(chunk_size):
+    parser = MultipartParser(BOUNDARY)
+    events = []
+    for offset in range(0, len(BODY), chunk_size):
+        events += parser.feed(BODY[offset : offset + chunk_size])
+    parser.close()
+    # adjacent data events depend on the chunking, join them
+    joined = []
+    for event, value in events:
+        if event == "data" and joined and joined[-1][0] == "data":
+            joined[-1] = ("data", joined[-1][1] + value)
+        else:
+            joined.append((event, value))
+    return joined
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, len(BODY)])
+def test_parser_any_chunking(chunk_size):
+    events = parse(chunk_size)
+    assert [event for event, _ in events] == ["begin", "data", "end", "begin", "data", "end"]
+    assert events[0][1]["content-disposition"] == 'form-data; name="title"'
+    assert events[1][1] == b"hello"
+    assert events[3][1]["content-type"] == "text/plain"
+    assert events[4][1] == b"line 1\r\nline 2"
+
+
+def test_parser_truncated_body():
+    parser = MultipartParser(BOUNDARY)
+    parser.feed(BODY[:60])
+    with pytest.raises(RuntimeError):
+        parser.close()
+
+
+def test_parser_header_limit():
+    parser = MultipartParser(BOUNDARY, max_header_size=16)
+    with pytest.raises(RuntimeError):
+        parser.feed(b"------boundary\r\n" + b"X-Long: " + b"a" * 64 + b"\r\n\r\n")
+
+
+def test_options_header():
+    assert parse_options_header('form-data; name="a"; filename="b \\"c\\".txt"') == (
+        "form-data",
+        {"name": "a", "filename": 'b "c".txt'},
+    )
+    (_, options) = parse_options_header(
+        "form-data; filename=\"plain.txt\"; filename*=UTF-8''%C3%A9t%C3%A9.txt"
+    )
+    assert options["filename"] == "été.txt"
+    assert get_boundary("multipart/form-data; boundary=abc") == b"abc"
+    with pytest.raises(RuntimeError):
+        get_boundary("application/json")
+
+
+async def chunks(data, size):
+    for offset in range(0, len(data), size):
+        yield data[offset : offset + size]
+
+
+async def read_parts(**options):
+    parts = []
+    async for part in MultipartReader(
+        chunks(BODY, 5), "multipart/form-data; boundary=%s" % BOUNDARY, **options
+    ):
+        if isinstance(part, UploadFile):
+            parts.append((part.name, part.filename, part.in_memory, await part.read()))
+            await part.close()
+        else:
+            parts.append(part)
+    return parts
+
+
+def test_reader():
+    (field, upload) = asyncio.run(read_parts())
+    assert isinstance(field, FormField)
+    assert (field.name, field.value) == ("title", "hello")
+    assert upload == ("file", "a.txt", True, b"line 1\r\nline 2")
+
+
+def test_reader_spools_to_disk():
+    (_, upload) = asyncio.run(read_parts(spool_size=4))
+    assert upload == ("file", "a.txt", False, b"line 1\r\nline 2")
+
+
+def test_reader_limits():
+    with pytest.raises(RuntimeError):
+        asyncio.run(read_parts(max_fields=1))
+    with pytest.raises(RuntimeError):
+        asyncio.run(read_parts(max_field_size=2))
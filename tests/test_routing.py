@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from socketify_extra import Socketify, MiddlewareRouter, DecoratorRouter
+from socketify_extra.dataclasses import CachePolicy
+from socketify_extra.helpers import compile_pipeline, run_pipeline
+from socketify_extra.trie import TrieRouter
+
+
+def handler(res, req, data=None):
+    res.end("ok")
+
+
+def middleware(res, req, data=None):
+    return data
+
+
+def test_cache_rejects_middlewares():
+    app = Socketify()
+    with pytest.raises(RuntimeError):
+        MiddlewareRouter(app, middleware).get("/cached", handler, cache=CachePolicy())
+    with pytest.raises(RuntimeError):
+        app.get("/cached", handler, middlewares=[middleware], cache=CachePolicy())
+    app.get("/cached", handler, cache=CachePolicy())
+
+
+def test_trie_match():
+    router = TrieRouter(Socketify(), "/api")
+    user = router.add_route("/users/{id:int}", handler)
+    me = router.add_route("/users/me", handler, methods=("GET", "PUT"))
+    slug = router.add_route("/posts/{slug:[a-z-]+}", handler)
+    files = router.add_route("/files/{rest:path}", handler, methods=("*",))
+
+    assert router.match("GET", "/api/users/me") == (me, ())
+    assert router.match("PUT", "/api/users/me") == (me, ())
+    assert router.match("GET", "/api/users/42") == (user, (("id", "42", 42),))
+    assert router.match("GET", "/api/users/abc") is None
+    assert router.match("POST", "/api/users/42") is None
+    assert router.match("GET", "/api/posts/hello-world") == (
+        slug, (("slug", "hello-world", "hello-world"),)
+    )
+    assert router.match("GET", "/api/posts/Hello") is None
+    assert router.match("DELETE", "/api/files/a/b.txt") == (
+        files, (("rest", "a/b.txt", "a/b.txt"),)
+    )
+    # repeated urls are answered from the match cache
+    assert ("GET", "/api/users/42") in router._cache
+
+
+def test_trie_invalid_routes():
+    router = TrieRouter(Socketify())
+    with pytest.raises(RuntimeError):
+        router.add_route("/{rest:path}/more", handler)
+    with pytest.raises(RuntimeError):
+        router.add_route("/{id:[}", handler)
+    with pytest.raises(RuntimeError):
+        router.add_route("/{:int}", handler)
+
+
+async def async_stage(res, req, data):
+    return data
+
+
+def test_compile_pipeline():
+    assert compile_pipeline([]) == ()
+    assert compile_pipeline([middleware, middleware, async_stage, middleware]) == (
+        (False, (middleware, middleware)),
+        (True, (async_stage,)),
+        (False, (middleware,)),
+    )
+
+
+def test_run_pipeline_stops_on_falsy():
+    calls = []
+
+    def stage(res, req, data):
+        calls.append(data)
+        return data + 1 if data < 2 else None
+
+    segments = compile_pipeline([stage, async_stage, stage, stage, stage])
+    assert asyncio.run(run_pipeline(segments, None, None, 0)) is None
+    assert calls == [0, 1, 2]
+
+
+def test_mount_routers():
+    app = Socketify()
+    api = app.router("/api")
+    users = DecoratorRouter(None, "/users")
+    users.get("/list")(handler)
+    api.mount(users, "/v1")
+    users.get("/me")(handler)
+    assert [route.path for route in app.routes] == [
+        "/api/v1/users/list", "/api/v1/users/me"
+    ]
+    with pytest.raises(RuntimeError):
+        api.mount(app.router("/other"))
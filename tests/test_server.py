@@ -0,0 +1,132 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_get_headers(server):
+    (status, _, body) = server.request("GET", "/headers", headers={"X-Test": "a"})
+    assert (status, body) == (200, b"a")
+    assert server.alive()
+
+
+def test_write_headers(server):
+    # the status goes out before the first header, a long list in one call
+    (status, headers, body) = server.request("GET", "/write-headers")
+    assert (status, body) == (201, b"created")
+    headers = dict(headers)
+    assert headers["X-First"] == "1"
+    assert headers["Set-Cookie"].startswith("session=a+b")
+    assert [headers["X-Header-%d" % index] for index in range(20)] == [
+        str(index) for index in range(20)
+    ]
+    (status, headers, body) = server.request("GET", "/status-with-headers")
+    assert (status, body) == (202, b"accepted")
+    assert dict(headers)["X-Header-19"] == "19"
+    assert server.alive()
+
+
+def test_header_set(server):
+    (status, headers, body) = server.request("GET", "/header-set")
+    assert (status, body) == (203, b"set")
+    headers = dict(headers)
+    assert (headers["X-Frame-Options"], headers["X-Content-Type-Options"]) == ("DENY", "nosniff")
+    assert headers["X-Extra"] == "1"
+    assert server.alive()
+
+
+def test_preserve(server):
+    (status, _, body) = server.request("GET", "/preserve?page=1", headers={"X-Test": "a"})
+    assert (status, body) == (200, b"GET /preserve a")
+    assert server.alive()
+
+
+def test_cork_send_status(server):
+    (status, headers, body) = server.request("GET", "/cork-status")
+    assert (status, body) == (201, b'{"ok": true}')
+    assert dict(headers)["Content-Type"] == "application/json"
+    assert server.alive()
+
+
+def test_middleware_preserve(server):
+    (status, _, body) = server.request("GET", "/middleware", headers={"X-Test": "b"})
+    assert (status, body) == (200, b"test b")
+    assert server.alive()
+
+
+def test_concurrent_cache_misses(server):
+    # misses arriving while the first run is in flight wait for its answer
+    with ThreadPoolExecutor(3) as pool:
+        results = list(pool.map(lambda _: server.request("GET", "/cached"), range(3)))
+    assert [(status, body) for (status, _, body) in results] == [(200, b"run 1")] * 3
+    (status, _, body) = server.request("GET", "/cached")
+    assert (status, body) == (200, b"run 1")
+    assert server.alive()
+
+
+def chunked(size, chunk_size=512):
+    for offset in range(0, size, chunk_size):
+        yield b"x" * min(chunk_size, size - offset)
+
+
+def test_body_limit(server):
+    (status, _, body) = server.request("POST", "/body", b"x" * 500)
+    assert (status, body) == (200, b"500")
+    (status, _, _) = server.request("POST", "/body", b"x" * 5000)
+    assert status == 413
+    assert server.alive()
+
+
+def test_chunked_body_limit(server):
+    # an iterable body is sent chunked, the size is only known while reading
+    for _ in range(2):
+        (status, _, _) = server.request("POST", "/body", chunked(5000))
+        assert status == 413
+        assert server.alive()
+    (status, _, body) = server.request("POST", "/body", chunked(800))
+    assert (status, body) == (200, b"800")
+
+
+def test_automatic_methods(server):
+    # the automatic routes have to outlive RouteTable.commit()
+    (status, headers, _) = server.request("OPTIONS", "/headers")
+    assert status == 204
+    assert dict(headers)["Allow"] == "GET, HEAD, OPTIONS"
+    (status, headers, body) = server.request("DELETE", "/headers")
+    assert (status, body) == (405, b"")
+    (status, headers, body) = server.request("HEAD", "/headers", headers={"X-Test": "abc"})
+    assert (status, body, dict(headers)["Content-Length"]) == (200, b"", "3")
+    assert server.alive()
+
+
+def test_named_parameters(server):
+    (status, _, body) = server.request("GET", "/users/42/posts/h%C3%A9llo")
+    assert (status, body) == (200, b'{"id": 42, "slug": "h%C3%A9llo"}')
+    (status, _, _) = server.request("GET", "/users/abc/posts/x")
+    assert status == 404
+    (status, _, body) = server.request("GET", "/files/a.txt/rest/of/path")
+    assert (status, body) == (200, b"a.txt")
+    assert server.alive()
+
+
+def test_static_response(server):
+    (status, headers, body) = server.request("GET", "/static")
+    headers = dict(headers)
+    assert (status, body, headers["X-Static"]) == (200, b"ok", "1")
+    assert headers["Content-Type"] == "text/plain; charset=utf-8"
+    (status, headers, body) = server.request("HEAD", "/static")
+    assert (status, body, dict(headers)["Content-Length"]) == (200, b"", "2")
+    (status, headers, body) = server.request("GET", "/static-text")
+    assert (status, body, dict(headers)["X-Static"]) == (299, b"", "2")
+    assert server.alive()
+
+
+def test_host_routes(server):
+    (_, _, body) = server.request("GET", "/host", host="api.example.com")
+    assert body == b"api"
+    (_, _, body) = server.request("GET", "/host", host="API.example.com:8080")
+    assert body == b"api"
+    (_, _, body) = server.request("GET", "/host", host="www.example.com")
+    assert body == b"global"
+    (status, _, body) = server.request("GET", "/host-only", host="api.example.com")
+    assert (status, body) == (200, b"api")
+    (status, _, _) = server.request("GET", "/host-only", host="www.example.com")
+    assert status == 404
+    assert server.alive()